@@ -0,0 +1,157 @@
+"""Pipeline benchmark suite (headless)
+
+    python bench.py                              # every stage at 1k, 10k and 100k students
+    python bench.py --sizes 1000 --json a.json   # save results for diffing
+    python bench.py --compare a.json b.json      # per-stage ratios between two runs
+    python bench.py --seating --sizes 1000 50000 # seating engine alone on one big session
+"""
+import argparse
+import json
+import platform
+import random
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timezone
+
+from core import (
+    build_course_student_map,
+    build_student_course_map,
+    create_exam_sessions,
+    generate_seating_for_session,
+    generate_student_database,
+    seat_session,
+)
+
+
+def synthetic_rooms(num_students):
+    """Room table of 48-seat rooms that seats num_students at once"""
+    return {f"R{i:04d}": 48 for i in range(num_students // 48 + 1)}
+
+def synthetic_session(num_students, num_exams, seed=0):
+    """Course map and room table for one session of num_students over num_exams (skewed sizes)"""
+    rng = random.Random(seed)
+    weights = [1.0 / (i + 1) for i in range(num_exams)]
+    total_weight = sum(weights)
+
+    course_map = {}
+    next_reg = 0
+    for i, weight in enumerate(weights):
+        size = max(1, round(num_students * weight / total_weight))
+        course_map[f"EX{i:03d}"] = {
+            'students': [f"S{next_reg + j:07d}" for j in range(size)],
+            'year': rng.randint(1, 4),
+            'type': 'core'
+        }
+        next_reg += size
+
+    return course_map, synthetic_rooms(next_reg)
+
+def bench_seating(sizes, num_exams, repeat):
+    print(f"{'Students':>10} {'Exams':>6} {'Best (s)':>10} {'Seats/s':>12}")
+    for size in sizes:
+        course_map, classrooms = synthetic_session(size, num_exams)
+        courses = list(course_map)
+        best = float('inf')
+        for _ in range(repeat):
+            start = time.perf_counter()
+            seating = generate_seating_for_session(None, course_map, courses, classrooms)
+            best = min(best, time.perf_counter() - start)
+        print(f"{len(seating):>10} {num_exams:>6} {best:>10.4f} {len(seating) / best:>12,.0f}")
+
+def measure(func, repeat):
+    """Best wall time over repeat runs, then one traced run for peak memory and net allocations"""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        best = min(best, time.perf_counter() - start)
+
+    blocks_before = sys.getallocatedblocks()
+    tracemalloc.start()
+    traced = func()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    blocks = sys.getallocatedblocks() - blocks_before
+    del traced
+
+    return result, {'wall_s': best, 'peak_mb': peak / 2**20, 'net_blocks': blocks}
+
+def bench_pipeline(size, repeat, seed=0):
+    """Run every pipeline stage on size synthetic students; one record per stage"""
+    results = []
+
+    def record(stage, func, rows):
+        result, stats = measure(func, repeat)
+        stats.update({'size': size, 'stage': stage, 'rows': rows(result)})
+        results.append(stats)
+        print(f"{size:>8} {stage:<28} {stats['wall_s']:>9.4f} {stats['peak_mb']:>9.1f} {stats['net_blocks']:>10} {stats['rows']:>9}")
+        return result
+
+    students_df = record('generate_student_database',
+                         lambda: generate_student_database(students_per_year=size // 4, seed=seed), len)
+    record('build_student_course_map', lambda: build_student_course_map(students_df), len)
+    course_map = record('build_course_student_map', lambda: build_course_student_map(students_df), len)
+    # Rooms scale with the population, so large runs measure seating rather than overflow
+    classrooms = synthetic_rooms(size)
+    random.seed(seed)
+    schedule = record('create_exam_sessions',
+                      lambda: create_exam_sessions(course_map, classrooms=classrooms, time_budget=0.5), len)
+    record('seat_session',
+           lambda: [seat_session(course_map, courses, classrooms) for courses in schedule.values()],
+           lambda plans: sum(len(result.seating) for result in plans))
+    return results
+
+def compare(old_path, new_path):
+    """Print new/old ratios per (size, stage); > 1 means the new run is slower/bigger"""
+    with open(old_path) as f:
+        old = {(r['size'], r['stage']): r for r in json.load(f)['results']}
+    with open(new_path) as f:
+        new = {(r['size'], r['stage']): r for r in json.load(f)['results']}
+
+    print(f"{'Size':>8} {'Stage':<28} {'Wall old':>9} {'Wall new':>9} {'Ratio':>6} {'Peak ratio':>10}")
+    for key in sorted(old.keys() & new.keys()):
+        o, n = old[key], new[key]
+        wall_ratio = n['wall_s'] / o['wall_s'] if o['wall_s'] else float('inf')
+        peak_ratio = n['peak_mb'] / o['peak_mb'] if o['peak_mb'] else float('inf')
+        print(f"{key[0]:>8} {key[1]:<28} {o['wall_s']:>9.4f} {n['wall_s']:>9.4f} {wall_ratio:>6.2f} {peak_ratio:>10.2f}")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1_000, 10_000, 100_000])
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--json', help="Write results to this JSON file")
+    parser.add_argument('--compare', nargs=2, metavar=('OLD', 'NEW'), help="Diff two saved JSON runs")
+    parser.add_argument('--seating', action='store_true', help="Benchmark the seating engine alone")
+    parser.add_argument('--exams', type=int, default=20, help="Exams per session for --seating")
+    args = parser.parse_args(argv)
+
+    if args.compare:
+        compare(*args.compare)
+        return
+    if args.seating:
+        bench_seating(args.sizes, args.exams, args.repeat)
+        return
+
+    print(f"{'Size':>8} {'Stage':<28} {'Wall (s)':>9} {'Peak MB':>9} {'Net blocks':>10} {'Rows':>9}")
+    results = []
+    for size in args.sizes:
+        results.extend(bench_pipeline(size, args.repeat, args.seed))
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({
+                'meta': {
+                    'timestamp': datetime.now(timezone.utc).isoformat(),
+                    'python': platform.python_version(),
+                    'platform': platform.platform(),
+                    'repeat': args.repeat
+                },
+                'results': results
+            }, f, indent=2)
+        print(f"Results written to {args.json}")
+
+
+if __name__ == "__main__":
+    main()
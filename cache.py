@@ -0,0 +1,162 @@
+"""Content-hash keyed memoization of pipeline stages
+
+Results are keyed by a hash of a format version, the stage name, the function and the
+*content* of its arguments, so an equal DataFrame or course map built on another rerun
+still hits. Entries live in a bounded in-memory LRU and, when a directory is configured
+(EXAM_CACHE_DIR), in pickle files that survive an app restart.
+
+Cached values are shared between callers - treat them as read-only.
+"""
+import hashlib
+import os
+import pickle
+import tempfile
+import threading
+import weakref
+from collections import OrderedDict
+
+from lazy import LazyModule
+
+np = LazyModule('numpy')
+pd = LazyModule('pandas')
+
+# Bump when cached values change shape so entries written by older code are never loaded
+_FORMAT = 1
+
+# id(frame) -> (weakref to frame, digest): reruns that pass the same (unmodified)
+# DataFrame object skip re-hashing its rows
+_frame_digests = {}
+
+def _frame_digest(frame):
+    entry = _frame_digests.get(id(frame))
+    if entry is not None and entry[0]() is frame:
+        return entry[1]
+
+    h = hashlib.blake2b(digest_size=20)
+    h.update(pickle.dumps((list(frame.columns), [str(t) for t in frame.dtypes], frame.shape)))
+    h.update(pd.util.hash_pandas_object(frame, index=True).to_numpy().tobytes())
+    digest = h.digest()
+
+    frame_id = id(frame)
+    _frame_digests[frame_id] = (weakref.ref(frame, lambda _: _frame_digests.pop(frame_id, None)), digest)
+    return digest
+
+def _update_hash(h, obj):
+    """Feed a canonical byte form of obj into the hash object h"""
+    if isinstance(obj, pd.DataFrame):
+        h.update(b'DataFrame')
+        h.update(_frame_digest(obj))
+    elif isinstance(obj, pd.Series):
+        h.update(b'Series')
+        h.update(pickle.dumps((obj.name, str(obj.dtype))))
+        h.update(pd.util.hash_pandas_object(obj, index=True).to_numpy().tobytes())
+    elif isinstance(obj, np.ndarray):
+        h.update(b'ndarray')
+        h.update(pickle.dumps((obj.dtype.str, obj.shape)))
+        h.update(np.ascontiguousarray(obj).tobytes() if obj.dtype != object else pickle.dumps(obj.tolist()))
+    else:
+        # Plain Python data (dicts, lists, strings, numbers); pickling is done in C
+        h.update(pickle.dumps(obj, protocol=pickle.HIGHEST_PROTOCOL))
+
+def content_hash(*parts):
+    """Hex digest of the content of parts"""
+    h = hashlib.blake2b(digest_size=20)
+    for part in parts:
+        _update_hash(h, part)
+    return h.hexdigest()
+
+class StageCache:
+    """Bounded LRU of stage results with optional on-disk persistence"""
+
+    def __init__(self, maxsize=64, directory=None, disk_maxsize=256):
+        self.maxsize = maxsize
+        self.directory = directory
+        self.disk_maxsize = disk_maxsize
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key):
+        return os.path.join(self.directory, f"{key}.pkl")
+
+    def get(self, key, default=None):
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                return self._entries[key]
+
+        if self.directory and os.path.exists(self._path(key)):
+            try:
+                with open(self._path(key), 'rb') as f:
+                    value = pickle.load(f)
+            except Exception:
+                # Unreadable, truncated, or pickled against classes that have since changed
+                # or moved: a miss, and the entry is rewritten
+                return default
+            self._remember(key, value)
+            return value
+
+        return default
+
+    def put(self, key, value):
+        self._remember(key, value)
+        if self.directory:
+            # Write atomically so a crashed run never leaves a truncated entry
+            fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+            with os.fdopen(fd, 'wb') as f:
+                pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, self._path(key))
+            self._prune_disk()
+
+    def _remember(self, key, value):
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def _prune_disk(self):
+        """Drop the least recently written files beyond disk_maxsize"""
+        files = [os.path.join(self.directory, name) for name in os.listdir(self.directory) if name.endswith('.pkl')]
+        if len(files) > self.disk_maxsize:
+            files.sort(key=os.path.getmtime)
+            for path in files[:len(files) - self.disk_maxsize]:
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+
+    def call(self, stage, func, *args, **kwargs):
+        """Return func(*args, **kwargs), computed at most once per distinct input content"""
+        flat_kwargs = [part for item in sorted(kwargs.items()) for part in item]
+        key = f"{stage}-" + content_hash(_FORMAT, stage, func.__module__, func.__qualname__, len(args), *args, *flat_kwargs)
+        missing = object()
+        value = self.get(key, missing)
+        if value is not missing:
+            self.hits += 1
+            return value
+
+        self.misses += 1
+        value = func(*args, **kwargs)
+        self.put(key, value)
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+default_cache = StageCache(
+    maxsize=int(os.environ.get('EXAM_CACHE_SIZE', 64)),
+    directory=os.environ.get('EXAM_CACHE_DIR') or None
+)
+
+def cached(stage, func, *args, **kwargs):
+    """Memoize one pipeline stage call in the process-wide cache"""
+    return default_cache.call(stage, func, *args, **kwargs)
@@ -0,0 +1,117 @@
+"""Compiled catalogue - flat lookup tables built once from the nested course tables
+
+    core_rows: ((year, BranchCode, code), ...) in catalogue order, merged sections
+               included, without duplicates
+    electives: {year: (codes...)} without duplicates
+
+The built-in tables are compiled once when core is imported (core.CATALOG). Other
+tables are compiled once per table object: the tables are treated as read-only once
+compiled. A catalogue read from a file can also pass the file's digest as source; it
+is then cached in a marshal file under EXAM_CACHE_DIR (default ~/.cache/exam_timetable),
+so other processes and CLI runs of the same file skip the walk. Only the most recently
+used CACHE_FILES files are kept.
+"""
+import glob
+import hashlib
+import marshal
+import os
+import tempfile
+from collections import namedtuple
+
+Catalog = namedtuple('Catalog', ['core_rows', 'electives'])
+
+CACHE_FILES = 16
+
+# Bump when the compiled layout changes so old cache files are ignored
+_FORMAT = 2
+# id(core_courses) -> (core_courses, electives, Catalog); holding the tables keeps their
+# ids from being reused
+_compiled = {}
+_MEMORY_ENTRIES = 8
+
+
+def _cache_dir():
+    return os.environ.get('EXAM_CACHE_DIR') or os.path.join(os.path.expanduser('~'), '.cache', 'exam_timetable')
+
+def compile_catalog(core_courses, electives=None):
+    """Flatten {year: {branch: [{'code', 'merge'}]}} and {year: [codes]}"""
+    core_rows = []
+    seen_rows = set()
+    for year, branches in core_courses.items():
+        for branch_code, core_list in branches.items():
+            for core in core_list:
+                for section in (branch_code, core['merge']):
+                    if section and (year, section, core['code']) not in seen_rows:
+                        seen_rows.add((year, section, core['code']))
+                        core_rows.append((year, section, core['code']))
+
+    return Catalog(
+        core_rows=tuple(core_rows),
+        electives={year: tuple(dict.fromkeys(codes)) for year, codes in (electives or {}).items()}
+    )
+
+def file_digest(path):
+    """Content hash of a file path or an uploaded (binary) file object, for load_catalog's source
+    (None for streams that cannot be read again)"""
+    digest = hashlib.blake2b(digest_size=16)
+    if hasattr(path, 'getvalue'):
+        data = path.getvalue()
+        digest.update(data.encode() if isinstance(data, str) else data)
+    elif hasattr(path, 'read'):
+        return None
+    else:
+        with open(path, 'rb') as f:
+            for block in iter(lambda: f.read(1 << 20), b''):
+                digest.update(block)
+    return digest.hexdigest()
+
+def _prune(directory):
+    """Drop all but the CACHE_FILES most recently used catalogue files"""
+    files = sorted(glob.glob(os.path.join(directory, 'catalog-*.marshal')), key=os.path.getmtime, reverse=True)
+    for path in files[CACHE_FILES:]:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+def _load_file(path, core_courses, electives):
+    try:
+        with open(path, 'rb') as f:
+            catalog = Catalog(*marshal.load(f))
+        os.utime(path)   # most recently used, for _prune
+        return catalog
+    except (OSError, EOFError, ValueError, TypeError):
+        pass
+
+    catalog = compile_catalog(core_courses, electives)
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+        with os.fdopen(fd, 'wb') as f:
+            marshal.dump(tuple(catalog), f)
+        os.replace(tmp, path)
+        _prune(os.path.dirname(path))
+    except OSError:
+        pass   # read-only disk: the in-process copy still helps
+    return catalog
+
+def load_catalog(core_courses, electives=None, source=None, cache_dir=None):
+    """Compiled Catalog for the given tables, from memory, disk (with a source digest) or fresh
+
+    Without electives, any catalogue already compiled for core_courses is returned.
+    """
+    key = id(core_courses)
+    entry = _compiled.get(key)
+    if entry is not None and entry[0] is core_courses and (electives is None or entry[1] is electives):
+        return entry[2]
+
+    if source is None:
+        catalog = compile_catalog(core_courses, electives)
+    else:
+        name = hashlib.blake2b(f"{_FORMAT}:{source}".encode(), digest_size=16).hexdigest()
+        catalog = _load_file(os.path.join(cache_dir or _cache_dir(), f"catalog-{name}.marshal"), core_courses, electives)
+
+    if key not in _compiled and len(_compiled) >= _MEMORY_ENTRIES:
+        _compiled.pop(next(iter(_compiled)))
+    _compiled[key] = (core_courses, electives, catalog)
+    return catalog
@@ -0,0 +1,247 @@
+"""Command-line entry point for headless (cron) exam planning"""
+import argparse
+import logging
+import os
+import random
+import sys
+
+from core import (
+    build_course_student_map,
+    create_exam_sessions,
+    generate_all_seating,
+    generate_student_database,
+    write_student_database,
+)
+from export import EXPORTERS
+from importer import import_registrar
+from layout import generate_all_layout_seating, load_layouts
+from lazy import LazyModule
+import instrument
+from rooms import STRATEGIES, load_classrooms
+from search import search_plans
+from store import SeatStore, serve
+from timetable import optimise_timetable, timetable_frame
+from verify import verify_seating
+
+pd = LazyModule('pandas')
+
+
+def load_students(path, seed=None):
+    """Load a students CSV, or generate the synthetic database when no path is given"""
+    if not path:
+        return generate_student_database(seed=seed)
+    if path.endswith('.parquet'):
+        return pd.read_parquet(path)
+    return pd.read_csv(path, dtype={'RegNo': str, 'Section': str, 'Elective': str}, keep_default_na=False)
+
+def cmd_generate(args):
+    """Stream a synthetic student population to CSV/Parquet"""
+    rows = write_student_database(
+        args.out,
+        students_per_year=args.students_per_year,
+        years=args.years,
+        elective_skew=args.elective_skew,
+        seed=args.seed,
+        chunk_size=args.chunk_size
+    )
+    print(f"✅ {rows} students written to {args.out}")
+    return 0
+
+def cmd_import(args):
+    """Validate registrar exports and write every rejected row to one error report"""
+    data = import_registrar(args.students, args.catalogue, args.enrolments, args.rooms, chunk_size=args.chunk_size)
+    print(f"✅ {len(data.students)} students, {len(data.course_map)} courses"
+          + (f", {len(data.classrooms)} rooms" if data.classrooms is not None else ""))
+    if len(data.errors):
+        data.errors.to_csv(args.errors, index=False)
+        print(f"⚠️ {len(data.errors)} rows rejected (see {args.errors})")
+        return 1
+    return 0
+
+def cmd_plan(args):
+    """Build the schedule and seat every session in parallel"""
+    rejected = 0
+    if args.catalogue:
+        data = import_registrar(args.students, args.catalogue, args.enrolments, args.rooms)
+        if len(data.errors):
+            os.makedirs(args.out, exist_ok=True)
+            data.errors.to_csv(os.path.join(args.out, 'import_errors.csv'), index=False)
+            print(f"⚠️ {len(data.errors)} rows rejected on import (see import_errors.csv)")
+            rejected = len(data.errors)
+        students_df, course_map, classrooms = data.students, data.course_map, data.classrooms
+    else:
+        student_seed = args.student_seed
+        if not args.students and student_seed is None:
+            # Synthetic students are part of the plan: fix them so the reported seeds rebuild it
+            student_seed = args.seed if args.seed is not None else random.randrange(2**31)
+        students_df = load_students(args.students, student_seed)
+        course_map = build_course_student_map(students_df)
+        classrooms = load_classrooms(args.rooms) if args.rooms else None
+    seed = args.seed
+    best = None
+    if args.candidates:
+        best = search_plans(course_map, args.candidates, args.sessions, classrooms, args.strategy, target=args.target,
+                            max_workers=args.workers, seed=args.seed)
+        schedule, seed = best.schedule, best.seed
+        print(f"🎯 Best of {best.evaluated} candidates: seed {best.seed}, score {best.score} "
+              f"({best.metrics['rooms']} rooms, {best.metrics['utilisation']:.1%} seats used, "
+              f"{best.metrics['single_desks']} single desks) - rerun with --seed {best.seed}"
+              + ("" if args.catalogue or args.students else f" --student-seed {student_seed}"))
+    else:
+        schedule = create_exam_sessions(course_map, args.sessions, classrooms=classrooms, seed=seed)
+
+    # Compact plans: the whole schedule stays cheap to hold until it is written out
+    if args.geometry or args.layouts:
+        layouts = load_layouts(args.layouts) if args.layouts else {}
+        plans = generate_all_layout_seating(course_map, schedule, layouts, max_workers=args.workers,
+                                            classrooms=classrooms, strategy=args.strategy, compact=True, seed=seed)
+    elif best is not None:
+        layouts = None
+        plans = best.plans
+    else:
+        layouts = None
+        plans = generate_all_seating(students_df, course_map, schedule, max_workers=args.workers,
+                                     classrooms=classrooms, strategy=args.strategy, compact=True, seed=seed)
+
+    os.makedirs(args.out, exist_ok=True)
+
+    schedule_rows = [
+        {'Session': session_name, 'Course': course}
+        for session_name, courses in schedule.items()
+        for course in courses
+    ]
+    pd.DataFrame(schedule_rows).to_csv(os.path.join(args.out, 'schedule.csv'), index=False)
+
+    if args.slots_per_day:
+        timetable = optimise_timetable(schedule, course_map, days=args.days, slots_per_day=args.slots_per_day,
+                                       time_budget=args.timetable_budget)
+        timetable_frame(timetable, schedule, course_map).to_csv(os.path.join(args.out, 'timetable.csv'), index=False)
+        print(f"📅 {len(timetable.breakdown['day_loads'])} days: {timetable.breakdown['back_to_back']} back-to-back, "
+              f"{timetable.breakdown['same_day']} same-day (see timetable.csv)")
+
+    total_violations = 0
+    total_overflow = 0
+    for session_name, result in plans.items():
+        seating, overflow, allocation = result.seating.to_frame(), result.overflow, result.allocation
+        seating.to_csv(os.path.join(args.out, f"{session_name}.csv"), index=False)
+        if len(overflow):
+            overflow.to_csv(os.path.join(args.out, f"{session_name}_overflow.csv"), index=False)
+        violations = verify_seating(seating, course_map, schedule[session_name], classrooms, overflow, layouts)
+        violations = violations[violations['Type'] != 'overflow']
+        if len(violations):
+            violations.to_csv(os.path.join(args.out, f"{session_name}_violations.csv"), index=False)
+        total_violations += len(violations)
+        total_overflow += len(overflow)
+        print(f"{session_name}: {len(seating)} students, {len(allocation.rooms)} rooms, "
+              f"{len(overflow)} overflow, {len(violations)} violations"
+              + (f", {result.relaxed} neighbour pairs relaxed" if hasattr(result, 'relaxed') else ""))
+
+    if args.db:
+        with SeatStore(args.db) as store:
+            rows = store.save_plans(plans)
+        print(f"💾 {rows} seats saved to {args.db}")
+
+    for fmt in args.export or []:
+        path = os.path.join(args.out, f"all_sessions.{fmt}")
+        EXPORTERS[fmt](plans, path)
+        print(f"📦 {path}")
+
+    print(f"✅ {len(plans)} sessions written to {args.out}")
+    if total_overflow:
+        print(f"⚠️ {total_overflow} students did not fit (see *_overflow.csv)")
+    if total_violations:
+        print(f"⚠️ {total_violations} violations (see *_violations.csv)")
+    if rejected:
+        print(f"⚠️ {rejected} registrar rows were rejected - their students may be missing from the plan")
+    return 1 if total_violations or total_overflow or rejected else 0
+
+def cmd_lookup(args):
+    """Print a student's seats in every session"""
+    if not os.path.exists(args.db):
+        print(f"⚠️ No seat store at {args.db}")
+        return 1
+    with SeatStore(args.db, readonly=True) as store:
+        seats = store.lookup(args.regno)
+    if not seats:
+        print(f"⚠️ No seats for {args.regno}")
+        return 1
+    for seat in seats:
+        print(f"{seat['Session']}: {seat['Exam']} - {seat['Classroom']} desk {seat['Desk']} ({seat['Position']})")
+    return 0
+
+def cmd_serve(args):
+    """Serve seat lookups over HTTP until interrupted"""
+    print(f"🌐 Serving {args.db} on http://{args.host}:{args.port} ({args.workers} workers)")
+    serve(args.db, args.host, args.port, args.workers)
+    return 0
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Exam Seating System (headless)")
+    parser.add_argument('--instrument', action='store_true', help="Log per-stage time, rows and peak memory as JSON to stderr")
+    parser.add_argument('--profile-dir', help="Also write a cProfile dump per stage into this directory")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    generate = subparsers.add_parser('generate', help="Write a synthetic student population")
+    generate.add_argument('--out', default='students.csv', help="Output file (.csv or .parquet)")
+    generate.add_argument('--students-per-year', type=int, default=300)
+    generate.add_argument('--years', type=int, default=4)
+    generate.add_argument('--elective-skew', type=float, default=0.0, help="0 = even, 1 = Zipf-like popularity")
+    generate.add_argument('--seed', type=int, default=None)
+    generate.add_argument('--chunk-size', type=int, default=100_000)
+    generate.set_defaults(func=cmd_generate)
+
+    registrar = subparsers.add_parser('import', help="Validate registrar exports and report bad rows")
+    registrar.add_argument('--students', required=True, help="students.csv (RegNo, Year, Branch, Section, BranchCode, Elective)")
+    registrar.add_argument('--catalogue', required=True, help="catalogue.csv (Course, Year, Type, BranchCode, Merge)")
+    registrar.add_argument('--enrolments', help="enrolments.csv (RegNo, Course)")
+    registrar.add_argument('--rooms', help="rooms.csv (Room, Capacity)")
+    registrar.add_argument('--chunk-size', type=int, default=200_000)
+    registrar.add_argument('--errors', default='import_errors.csv', help="Error report path")
+    registrar.set_defaults(func=cmd_import)
+
+    plan = subparsers.add_parser('plan', help="Schedule and seat all sessions")
+    plan.add_argument('--students', help="Students CSV/Parquet (default: generate synthetic students)")
+    plan.add_argument('--catalogue', help="Registrar course catalogue CSV; imports --students/--enrolments/--rooms as registrar exports")
+    plan.add_argument('--enrolments', help="Registrar enrolments CSV (with --catalogue)")
+    plan.add_argument('--sessions', type=int, default=None, help="Minimum number of sessions (default: fewest that fit)")
+    plan.add_argument('--workers', type=int, default=None, help="Worker processes (default: CPU count)")
+    plan.add_argument('--rooms', help="Classroom config, CSV (Room,Capacity) or JSON (default: built-in CLASSROOMS)")
+    plan.add_argument('--strategy', choices=STRATEGIES, default='best_fit', help="Room allocation strategy")
+    plan.add_argument('--export', nargs='+', choices=sorted(EXPORTERS), help="Also write all sessions as one ZIP/Parquet/PDF")
+    plan.add_argument('--out', default='seating_output', help="Output directory")
+    plan.add_argument('--geometry', action='store_true', help="Keep each exam apart front/back/side on the room grids")
+    plan.add_argument('--layouts', help="Room layouts, CSV (Room,Rows,Columns) or JSON; implies --geometry")
+    plan.add_argument('--db', help="Also save every seat into this SQLite seat store")
+    plan.add_argument('--seed', type=int, default=None, help="Seed for a reproducible schedule and seating")
+    plan.add_argument('--student-seed', type=int, default=None, help="Seed of the synthetic students (without --students; default: --seed)")
+    plan.add_argument('--candidates', type=int, help="Search this many seeded plans and keep the best scoring one")
+    plan.add_argument('--target', type=float, default=None, help="Stop the search once a plan scores at or below this")
+    plan.add_argument('--slots-per-day', type=int, help="Also lay the sessions out on a day/slot timetable (timetable.csv)")
+    plan.add_argument('--days', type=int, default=None, help="Exam days for the timetable (default: fewest that fit)")
+    plan.add_argument('--timetable-budget', type=float, default=10.0, help="Seconds for the timetable search")
+    plan.set_defaults(func=cmd_plan)
+
+    lookup = subparsers.add_parser('lookup', help="Show where a student sits in every session")
+    lookup.add_argument('regno')
+    lookup.add_argument('--db', default='seats.db', help="Seat store written by plan --db")
+    lookup.set_defaults(func=cmd_lookup)
+
+    service = subparsers.add_parser('serve', help="HTTP seat lookup service (GET /seat/<RegNo>, /room/<Session>/<Room>)")
+    service.add_argument('--db', default='seats.db', help="Seat store written by plan --db")
+    service.add_argument('--host', default='127.0.0.1')
+    service.add_argument('--port', type=int, default=8080)
+    service.add_argument('--workers', type=int, default=1, help="Processes sharing the port")
+    service.set_defaults(func=cmd_serve)
+
+    return parser
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    if args.instrument or args.profile_dir or instrument.enabled():
+        logging.basicConfig(level=logging.INFO, format='%(message)s')
+        instrument.enable(True, args.profile_dir or instrument.profile_dir())
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,204 @@
+"""Co-enrolment matrix and incremental schedule editing
+
+coenrolment() builds, once per course map, a course x course matrix of shared students
+plus per-course sizes, years and types. A ScheduleEditor keeps per-session aggregates
+over it (seats, seats per year/type, student clashes, core/elective mixes) and a
+course x session matrix of students shared with each session, so
+
+    editor.preview(course)        each session's stats with course moved in  - O(sessions)
+    editor.move_course(course, s) apply it                                  - O(1) aggregates,
+                                                                              one column update
+
+without recounting any session from the student lists.
+"""
+from collections import namedtuple
+
+from core import CLASSROOMS, session_seat_demand
+from instrument import instrumented
+from lazy import LazyModule
+
+np = LazyModule('numpy')
+pd = LazyModule('pandas')
+
+# courses: course codes in course-map order; index: {course: position}
+# sizes, years: int arrays; types: 'core' / 'elective' per course
+# matrix: matrix[a, b] = students taking both a and b (diagonal 0)
+CoEnrolment = namedtuple('CoEnrolment', ['courses', 'index', 'sizes', 'years', 'types', 'matrix'])
+
+# One session after an edit, or as previewed
+SessionStats = namedtuple('SessionStats', ['session', 'courses', 'seats', 'demand', 'fits', 'clashes', 'mixed_years'])
+
+
+@instrumented('coenrolment', rows=lambda result: len(result.courses))
+def coenrolment(course_student_map):
+    """Course x course shared-student counts from {course: {'students', 'year', 'type'}}"""
+    courses = list(course_student_map)
+    index = {course: i for i, course in enumerate(courses)}
+    sizes = np.array([len(course_student_map[c]['students']) for c in courses], dtype='int64')
+
+    # (student, course) pairs sorted by student: a student's courses are one contiguous run
+    course_ids = np.repeat(np.arange(len(courses)), sizes)
+    student_ids = pd.factorize(pd.Series(
+        [reg_no for c in courses for reg_no in course_student_map[c]['students']], dtype=object
+    ))[0]
+    order = np.argsort(student_ids, kind='stable')
+    student_ids, course_ids = student_ids[order], course_ids[order]
+
+    # Pair every entry with the ones 1, 2, ... places later in the same run
+    matrix = np.zeros((len(courses), len(courses)), dtype='int64')
+    offset = 1
+    while offset < len(student_ids):
+        same = student_ids[offset:] == student_ids[:-offset]
+        if not same.any():
+            break
+        a, b = course_ids[:-offset][same], course_ids[offset:][same]
+        np.add.at(matrix, (a, b), 1)
+        offset += 1
+    matrix += matrix.T
+    np.fill_diagonal(matrix, 0)
+
+    return CoEnrolment(
+        courses=courses,
+        index=index,
+        sizes=sizes,
+        years=np.array([course_student_map[c]['year'] for c in courses], dtype='int64'),
+        types=[course_student_map[c]['type'] for c in courses],
+        matrix=matrix
+    )
+
+class ScheduleEditor:
+    """A schedule with incrementally maintained per-session aggregates
+
+    Courses missing from the co-enrolment (no students) are kept but count for nothing.
+    """
+
+    def __init__(self, schedule, coenrol, classrooms=None):
+        if classrooms is None:
+            classrooms = CLASSROOMS
+        self.coenrol = coenrol
+        self.capacity = sum(classrooms.values())
+        self.sessions = {name: list(courses) for name, courses in schedule.items()}
+        self.names = list(self.sessions)
+        self.position = {name: i for i, name in enumerate(self.names)}
+        self.where = {course: name for name, courses in self.sessions.items() for course in courses}
+
+        n = len(coenrol.courses)
+        # shared[c, s]: students of course c also sitting an exam of session s
+        membership = np.zeros((n, len(self.names)), dtype='int64')
+        for name, courses in self.sessions.items():
+            for course in courses:
+                if course in coenrol.index:
+                    membership[coenrol.index[course], self.position[name]] = 1
+        self.shared = coenrol.matrix @ membership
+
+        self.seats = [0] * len(self.names)
+        self.largest = [0] * len(self.names)
+        self.clashes = [0] * len(self.names)
+        self.by_year_type = [{} for _ in self.names]   # {(year, type): [courses, seats]}
+        for name, courses in self.sessions.items():
+            s = self.position[name]
+            for course in courses:
+                self._add(course, s)
+            # Each clashing pair was counted from both of its courses
+            self.clashes[s] //= 2
+
+    def _add(self, course, s, sign=1):
+        i = self.coenrol.index.get(course)
+        if i is None:
+            return
+        size = int(self.coenrol.sizes[i])
+        self.seats[s] += sign * size
+        self.clashes[s] += sign * int(self.shared[i, s])
+        counts = self.by_year_type[s].setdefault((int(self.coenrol.years[i]), self.coenrol.types[i]), [0, 0])
+        counts[0] += sign
+        counts[1] += sign * size
+        if sign > 0:
+            self.largest[s] = max(self.largest[s], size)
+        elif size == self.largest[s]:
+            # Only removing the largest exam needs a rescan of the session
+            self.largest[s] = max((int(self.coenrol.sizes[self.coenrol.index[c]]) for c in self.sessions[self.names[s]]
+                                   if c != course and c in self.coenrol.index), default=0)
+
+    def stats(self, name):
+        s = self.position[name]
+        years = {year for (year, _), (count, _) in self.by_year_type[s].items() if count}
+        mixed = sum(1 for year in years
+                    if self.by_year_type[s].get((year, 'core'), [0])[0] and self.by_year_type[s].get((year, 'elective'), [0])[0])
+        demand = session_seat_demand(self.seats[s], self.largest[s])
+        return SessionStats(session=name, courses=len(self.sessions[name]), seats=self.seats[s], demand=demand,
+                            fits=demand <= self.capacity, clashes=self.clashes[s], mixed_years=mixed)
+
+    def preview(self, course):
+        """{session: SessionStats} each session would have with course moved into it"""
+        i = self.coenrol.index.get(course)
+        current = self.where[course]
+        effect = {}
+        for name in self.names:
+            stats = self.stats(name)
+            if name == current or i is None:
+                effect[name] = stats
+                continue
+            s = self.position[name]
+            size = int(self.coenrol.sizes[i])
+            year, course_type = int(self.coenrol.years[i]), self.coenrol.types[i]
+            other = 'elective' if course_type == 'core' else 'core'
+            # The course's year newly gets both kinds of exam in this session
+            newly_mixed = (self.by_year_type[s].get((year, other), [0])[0] > 0
+                           and not self.by_year_type[s].get((year, course_type), [0])[0])
+            demand = session_seat_demand(stats.seats + size, max(self.largest[s], size))
+            effect[name] = stats._replace(courses=stats.courses + 1, seats=stats.seats + size, demand=demand,
+                                          fits=demand <= self.capacity, clashes=stats.clashes + int(self.shared[i, s]),
+                                          mixed_years=stats.mixed_years + newly_mixed)
+        return effect
+
+    def move_course(self, course, name):
+        """Move course into session name (a new name opens a session); returns both sessions' stats"""
+        source = self.where[course]
+        if name == source:
+            return self.stats(source), self.stats(name)
+        if name not in self.sessions:
+            self.sessions[name] = []
+            self.position[name] = len(self.names)
+            self.names.append(name)
+            self.shared = np.hstack([self.shared, np.zeros((len(self.shared), 1), dtype='int64')])
+            self.seats.append(0)
+            self.largest.append(0)
+            self.clashes.append(0)
+            self.by_year_type.append({})
+
+        s, t = self.position[source], self.position[name]
+        self._add(course, s, sign=-1)
+        self.sessions[source].remove(course)
+        i = self.coenrol.index.get(course)
+        if i is not None:
+            # Every course's students-shared-with-session columns, for the two sessions touched
+            self.shared[:, s] -= self.coenrol.matrix[i]
+            self.shared[:, t] += self.coenrol.matrix[i]
+        self.sessions[name].append(course)
+        self.where[course] = name
+        self._add(course, t)
+        return self.stats(source), self.stats(name)
+
+    def schedule(self):
+        """{session: [courses]}, dropping sessions an edit emptied"""
+        return {name: list(courses) for name, courses in self.sessions.items() if courses}
+
+    def frame(self):
+        """One row per session: seats, demand, fit, clashes, core/elective year mixes, seats per year/type"""
+        rows = []
+        for name in self.names:
+            if not self.sessions[name]:
+                continue
+            stats = self.stats(name)
+            row = {
+                'Session': name, 'Courses': stats.courses, 'Seats': stats.seats, 'Demand': stats.demand,
+                'Fits': stats.fits, 'Clashes': stats.clashes, 'Mixed years': stats.mixed_years
+            }
+            for (year, course_type), (count, seats) in self.by_year_type[self.position[name]].items():
+                if count:
+                    row[f"Y{year} {course_type}"] = seats
+            rows.append(row)
+        frame = pd.DataFrame(rows)
+        groups = sorted(column for column in frame.columns if column.startswith('Y'))
+        frame[groups] = frame[groups].fillna(0).astype('int64')
+        return frame[[column for column in frame.columns if not column.startswith('Y')] + groups]
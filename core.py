@@ -0,0 +1,681 @@
+"""Exam planning core - catalogue, course mapping, scheduling and seating (no UI)"""
+import heapq
+import random
+import time
+import warnings
+from collections import defaultdict, namedtuple
+from concurrent.futures import ProcessPoolExecutor
+
+from catalog import compile_catalog, load_catalog
+from instrument import instrumented
+from lazy import LazyModule
+from rooms import allocate_rooms
+from seatplan import SeatingPlan
+
+np = LazyModule('numpy')
+pd = LazyModule('pandas')
+
+# Classroom capacities (excluding C002, C003, C004)
+CLASSROOMS = {
+    'C101': 48, 'C102': 48, 'C104': 48, 'C202': 48, 'C203': 48, 'C204': 48, 'C205': 48,
+    'C302': 48, 'C303': 48, 'C304': 48, 'C305': 48, 'C402': 48, 'C403': 48, 'C404': 48,
+    'C405': 48, 'C406': 48, 'C407': 48, 'C408': 48,
+    'LAB106': 40, 'LAB107': 40, 'LAB206': 40, 'LAB207': 40, 'LAB208': 40,
+    'LAB307': 40, 'LAB308': 40
+}
+
+# Main Electives (available to all branches in a year)
+MAIN_ELECTIVES = {
+    1: ['PH151', 'DS151', 'New_FSC', 'CS151'],
+    2: ['EC251', 'EC252', 'New_IESI', 'New_ESE', 'CS152', 'CS251', 'New_ESD1', 'New_IRFIC', 'EC253', 'New_2DCG'],
+    3: ['CS463', 'CS308', 'DS301', 'CS366', 'DS359', 'EC355', 'EC364', 'CS352', 'EC365'],
+    4: ['EC456', 'DS401', 'EC462', 'EC465', 'PH454', 'CS457', 'DS458', 'CS468', 'CS473', 'New_SDN', 'CS470', 'MA452', 'EC463']
+}
+
+# HSS Basket Electives (specific branches)
+HSS_ELECTIVES = {
+    1: ['HS157', 'New_KKN', 'New_LITSG', 'New_BOD', 'HS156'],
+    2: [],
+    3: [],
+    4: ['DS102']
+}
+
+# Core courses - ONLY fullsem + halfsem-2
+CORE_COURSES = {
+    1: {
+        'CSEA': [
+            {'code': 'MA162', 'merge': 'CSEB'},
+            {'code': 'EC161', 'merge': 'CSEB'},
+            {'code': 'CS161_CSEA', 'merge': ''},
+            {'code': 'HS161_CSEA', 'merge': ''}
+        ],
+        'CSEB': [
+            {'code': 'MA162', 'merge': 'CSEA'},
+            {'code': 'EC161', 'merge': 'CSEA'},
+            {'code': 'CS161_CSEB', 'merge': ''},
+            {'code': 'HS161_CSEB', 'merge': ''}
+        ],
+        'ECE': [
+            {'code': 'MA161', 'merge': 'DSAI'},
+            {'code': 'DS161', 'merge': 'DSAI'},
+            {'code': 'CS161_ECE', 'merge': ''}
+        ],
+        'DSAI': [
+            {'code': 'MA161', 'merge': 'ECE'},
+            {'code': 'DS161', 'merge': 'ECE'},
+            {'code': 'CS161_DSAI', 'merge': ''}
+        ]
+    },
+    2: {
+        'CSEA': [
+            {'code': 'MA262', 'merge': 'CSEB'},
+            {'code': 'CS262_CSEA', 'merge': ''},
+            {'code': 'CS263_CSEA', 'merge': ''},
+            {'code': 'CS264_CSEA', 'merge': ''},
+            {'code': 'HS261_CSEA', 'merge': ''}
+        ],
+        'CSEB': [
+            {'code': 'MA262', 'merge': 'CSEA'},
+            {'code': 'CS262_CSEB', 'merge': ''},
+            {'code': 'CS263_CSEB', 'merge': ''},
+            {'code': 'CS264_CSEB', 'merge': ''},
+            {'code': 'HS261_CSEB', 'merge': ''}
+        ],
+        'ECE': [
+            {'code': 'MA261', 'merge': 'DSAI'},
+            {'code': 'EC_SS', 'merge': ''},
+            {'code': 'EC_AEC', 'merge': ''},
+            {'code': 'EC_ML', 'merge': ''}
+        ],
+        'DSAI': [
+            {'code': 'MA261', 'merge': 'ECE'},
+            {'code': 'DS261', 'merge': ''},
+            {'code': 'DA262', 'merge': ''},
+            {'code': 'CS304_DSAI', 'merge': ''},
+            {'code': 'CS307_DSAI', 'merge': ''}
+        ]
+    },
+    3: {
+        'CSEA': [
+            {'code': 'CS309_CSEA', 'merge': ''},
+            {'code': 'CS303_CSEA', 'merge': ''},
+            {'code': 'CS304_CSEA', 'merge': ''},
+            {'code': 'HS101_CSEA', 'merge': ''}
+        ],
+        'CSEB': [
+            {'code': 'CS309_CSEB', 'merge': ''},
+            {'code': 'CS303_CSEB', 'merge': ''},
+            {'code': 'CS304_CSEB', 'merge': ''},
+            {'code': 'HS101_CSEB', 'merge': ''}
+        ],
+        'ECE': [
+            {'code': 'EC_DSP', 'merge': ''},
+            {'code': 'EC_IVD', 'merge': ''},
+            {'code': 'EC_IA', 'merge': ''},
+            {'code': 'EC_HW', 'merge': ''}
+        ],
+        'DSAI': [
+            {'code': 'DS302', 'merge': ''},
+            {'code': 'DS303', 'merge': ''},
+            {'code': 'CS307_DSAI3', 'merge': ''}
+        ]
+    },
+    4: {
+        'CSEA': [],
+        'CSEB': [],
+        'ECE': [],
+        'DSAI': []
+    }
+}
+
+# The built-in tables as flat lookups (main + HSS electives per year), compiled once
+CATALOG = compile_catalog(CORE_COURSES, {
+    year: MAIN_ELECTIVES.get(year, []) + HSS_ELECTIVES.get(year, []) for year in sorted(set(MAIN_ELECTIVES) | set(HSS_ELECTIVES))
+})
+
+# Branches of every year: (BranchCode, Branch, Section, RegNo code, share of the year)
+BRANCHES = [
+    ('CSEA', 'CSE', 'A', 'BCS', 80),
+    ('CSEB', 'CSE', 'B', 'BCS', 80),
+    ('ECE', 'ECE', '', 'BEC', 70),
+    ('DSAI', 'DSAI', '', 'BDS', 70)
+]
+
+STUDENT_COLUMNS = ['RegNo', 'Year', 'Branch', 'Section', 'BranchCode', 'Elective']
+
+def _split_counts(total, weights):
+    """Split total into integer counts proportional to weights (largest remainder, ties to the first)"""
+    weights = np.asarray(weights, dtype='float64')
+    shares = total * weights / weights.sum()
+    counts = np.floor(shares).astype('int64')
+    leftover = total - counts.sum()
+    counts[np.argsort(-(shares - counts), kind='stable')[:leftover]] += 1
+    return counts
+
+def iter_student_chunks(students_per_year=300, years=4, branches=None, electives=None,
+                        elective_skew=0.0, seed=None, chunk_size=100_000):
+    """Yield the synthetic student database as DataFrames of at most chunk_size rows
+    
+    students_per_year is an int or {year: count}; branches follows BRANCHES, each branch
+    getting its share of the year; electives is {year: [codes]} (default: main + HSS
+    electives of the catalogue). elective_skew 0 spreads electives evenly, larger values
+    give Zipf-like popularity. Only one chunk of rows is held in memory at a time, and the
+    same seed always yields the same students.
+    """
+    if branches is None:
+        branches = BRANCHES
+    rng = np.random.default_rng(seed)
+    
+    for year in range(1, years + 1):
+        total_students = students_per_year.get(year, 0) if isinstance(students_per_year, dict) else students_per_year
+        year_prefix = f"{(25 - (year - 1)) % 100:02d}"
+        
+        if electives is not None:
+            all_electives = list(electives.get(year, []))
+        else:
+            all_electives = list(CATALOG.electives.get(year, ()))
+        
+        # A year without electives leaves Elective empty (''), as the importer does
+        if not all_electives:
+            all_electives = ['']
+        
+        # Elective of every student of the year, as shuffled category codes
+        popularity = 1.0 / np.arange(1, len(all_electives) + 1) ** elective_skew
+        elective_counts = _split_counts(total_students, popularity)
+        elective_codes = rng.permutation(np.repeat(np.arange(len(all_electives), dtype='int32'), elective_counts))
+        elective_names = np.array(all_electives, dtype=object)
+        
+        branch_counts = _split_counts(total_students, [branch[4] for branch in branches])
+        next_number = defaultdict(lambda: 1)
+        offset = 0
+        
+        for (branch_code, branch_name, section, reg_code, _), count in zip(branches, branch_counts):
+            first = next_number[reg_code]
+            next_number[reg_code] += count
+            width = max(3, len(str(first + count - 1)))
+            
+            for start in range(0, count, chunk_size):
+                stop = min(start + chunk_size, count)
+                numbers = pd.Series(np.arange(first + start, first + stop)).astype(str).str.zfill(width)
+                yield pd.DataFrame({
+                    'RegNo': f"{year_prefix}{reg_code}" + numbers,
+                    'Year': year,
+                    'Branch': branch_name,
+                    'Section': section,
+                    'BranchCode': branch_code,
+                    'Elective': elective_names[elective_codes[offset + start:offset + stop]]
+                }, columns=STUDENT_COLUMNS)
+            
+            offset += count
+
+@instrumented('generate_students', rows=len)
+def generate_student_database(students_per_year=300, years=4, branches=None, electives=None,
+                              elective_skew=0.0, seed=None):
+    """Generate student database"""
+    chunks = list(iter_student_chunks(students_per_year, years, branches, electives, elective_skew, seed))
+    if not chunks:
+        return pd.DataFrame(columns=STUDENT_COLUMNS)
+    return pd.concat(chunks, ignore_index=True)
+
+def write_student_database(path, students_per_year=300, years=4, branches=None, electives=None,
+                           elective_skew=0.0, seed=None, chunk_size=100_000):
+    """Stream the synthetic student database to CSV or Parquet (by file extension) chunk by chunk"""
+    chunks = iter_student_chunks(students_per_year, years, branches, electives, elective_skew, seed, chunk_size)
+    rows = 0
+    
+    if str(path).endswith('.parquet'):
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise ImportError("Writing Parquet requires pyarrow (pip install pyarrow)")
+        
+        schema = pa.schema([
+            ('RegNo', pa.string()), ('Year', pa.int64()), ('Branch', pa.string()),
+            ('Section', pa.string()), ('BranchCode', pa.string()), ('Elective', pa.string())
+        ])
+        with pq.ParquetWriter(path, schema) as writer:
+            for chunk in chunks:
+                writer.write_table(pa.Table.from_pandas(chunk, schema=schema, preserve_index=False))
+                rows += len(chunk)
+    else:
+        header = True
+        with open(path, 'w', newline='') as f:
+            for chunk in chunks:
+                chunk.to_csv(f, index=False, header=header)
+                header = False
+                rows += len(chunk)
+            if header:
+                f.write(','.join(STUDENT_COLUMNS) + '\n')
+    
+    return rows
+
+# Student x course incidence in CSR form. Students and courses are integer IDs:
+#   regnos[s], years[s], branches[s]       -> student s
+#   courses[c], course_year[c], course_type[c] -> course c
+#   indices[indptr[c]:indptr[c+1]]          -> student IDs taking course c
+#   student_courses[student_indptr[s]:student_indptr[s+1]] -> course IDs of student s
+CourseIncidence = namedtuple('CourseIncidence', [
+    'regnos', 'years', 'branches',
+    'courses', 'course_year', 'course_type',
+    'indptr', 'indices',
+    'student_indptr', 'student_courses'
+])
+
+def core_enrolment_table(core_courses=None):
+    """Flatten CORE_COURSES into (Year, BranchCode, Course) rows, merged sections included"""
+    catalog = CATALOG if core_courses is None or core_courses is CORE_COURSES else load_catalog(core_courses)
+    
+    table = pd.DataFrame(list(catalog.core_rows), columns=['Year', 'BranchCode', 'Course'])
+    table['Year'] = table['Year'].astype('int64')
+    return table
+
+def build_course_incidence(students_df, core_courses=None):
+    """Encode students and courses as integer IDs and build the incidence in one grouped pass"""
+    core_table = core_enrolment_table(core_courses)
+    
+    student_ids, regnos = pd.factorize(students_df['RegNo'])
+    num_students = len(regnos)
+    years = students_df['Year'].to_numpy(dtype='int64')
+    electives = pd.Categorical(students_df['Elective'].fillna(''))
+    branch_ids, branch_codes = pd.factorize(students_df['BranchCode'])
+    year_ids, year_values = pd.factorize(years)
+    group_ids = year_ids * len(branch_codes) + branch_ids
+    
+    # Electives first (by year, in order of appearance), then core courses in catalogue order
+    has_elective = (electives != '')
+    elective_keys = pd.DataFrame({'Year': years[has_elective], 'Course': np.asarray(electives)[has_elective]})
+    elective_keys = elective_keys.drop_duplicates('Course').sort_values('Year', kind='stable')
+    core_keys = core_table.drop_duplicates('Course')[['Year', 'Course']]
+    core_keys = core_keys[~core_keys['Course'].isin(elective_keys['Course'])]
+    
+    courses = pd.Index(elective_keys['Course'].tolist() + core_keys['Course'].tolist(), dtype=object)
+    course_year = np.concatenate([elective_keys['Year'].to_numpy(), core_keys['Year'].to_numpy()]).astype('int64')
+    course_type = np.array(['elective'] * len(elective_keys) + ['core'] * len(core_keys), dtype=object)
+    
+    # Elective pairs: translate category codes to course IDs
+    elective_course_ids = courses.get_indexer(electives.categories)
+    pair_students = [student_ids[has_elective]]
+    pair_courses = [elective_course_ids[electives.codes[has_elective]]]
+    
+    # Core pairs: bucket students by (Year, BranchCode) once, then expand each catalogue row
+    group_order = np.argsort(group_ids, kind='stable')
+    group_bounds = np.concatenate([[0], np.cumsum(np.bincount(group_ids, minlength=len(year_values) * len(branch_codes)))])
+    group_index = {
+        (int(year), branch_code): y * len(branch_codes) + b
+        for y, year in enumerate(year_values)
+        for b, branch_code in enumerate(branch_codes)
+    }
+    core_course_ids = courses.get_indexer(core_table['Course'])
+    for year, branch_code, course_id in zip(core_table['Year'], core_table['BranchCode'], core_course_ids):
+        g = group_index.get((year, branch_code))
+        if g is not None:
+            members = student_ids[group_order[group_bounds[g]:group_bounds[g + 1]]]
+            pair_students.append(members)
+            pair_courses.append(np.full(len(members), course_id))
+    
+    # Drop duplicate enrolments while sorting into CSR order (course, then student)
+    pair_keys = np.sort(np.concatenate(pair_courses).astype('int64') * max(num_students, 1) + np.concatenate(pair_students))
+    if len(pair_keys):
+        pair_keys = pair_keys[np.concatenate([[True], pair_keys[1:] != pair_keys[:-1]])]
+    pair_courses, pair_students = np.divmod(pair_keys, max(num_students, 1))
+    indices = pair_students.astype('int32')
+    indptr = np.zeros(len(courses) + 1, dtype='int64')
+    np.cumsum(np.bincount(pair_courses, minlength=len(courses)), out=indptr[1:])
+    
+    # Transpose for the per-student view (stable, so courses stay in course-ID order)
+    order = np.argsort(indices, kind='stable')
+    student_courses = pair_courses[order].astype('int32')
+    student_indptr = np.zeros(num_students + 1, dtype='int64')
+    np.cumsum(np.bincount(indices, minlength=num_students), out=student_indptr[1:])
+    
+    # One row per RegNo (first occurrence) for the student attributes
+    first_rows = np.empty(num_students, dtype='int64')
+    first_rows[student_ids[::-1]] = np.arange(len(student_ids))[::-1]
+    
+    return CourseIncidence(
+        regnos=np.asarray(regnos, dtype=object),
+        years=years[first_rows],
+        branches=students_df['BranchCode'].to_numpy(dtype=object)[first_rows],
+        courses=courses, course_year=course_year, course_type=course_type,
+        indptr=indptr, indices=indices,
+        student_indptr=student_indptr, student_courses=student_courses
+    )
+
+def build_student_course_map(students_df, incidence=None):
+    """Map each student to all their courses (core + elective)"""
+    if incidence is None:
+        incidence = build_course_incidence(students_df)
+    
+    courses = incidence.courses.to_numpy(dtype=object)
+    indptr = incidence.student_indptr.tolist()
+    course_lists = courses[incidence.student_courses].tolist()
+    years = incidence.years.tolist()
+    branches = incidence.branches.tolist()
+    
+    return {
+        reg_no: {
+            'courses': course_lists[indptr[s]:indptr[s + 1]],
+            'year': years[s],
+            'branch': branches[s]
+        }
+        for s, reg_no in enumerate(incidence.regnos.tolist())
+    }
+
+@instrumented('course_map', rows=lambda course_map: sum(len(info['students']) for info in course_map.values()))
+def build_course_student_map(students_df, incidence=None):
+    """Map each course to all students taking it"""
+    if incidence is None:
+        incidence = build_course_incidence(students_df)
+    
+    regnos = incidence.regnos
+    indptr = incidence.indptr
+    
+    return {
+        code: {
+            'students': regnos[incidence.indices[indptr[c]:indptr[c + 1]]].tolist(),
+            'year': int(incidence.course_year[c]),
+            'type': incidence.course_type[c]
+        }
+        for c, code in enumerate(incidence.courses)
+    }
+
+def session_seat_demand(total, largest):
+    """Seats a session needs when no desk may hold the same exam twice
+    
+    Each desk holds at most one student of the largest exam, so once that exam is more
+    than half of the session its excess sits at half-empty desks.
+    """
+    return max(total, 2 * largest)
+
+def build_conflict_graph(course_student_map):
+    """Course conflict graph: two courses conflict if a student takes both, or if they are
+    a core and an elective of the same year"""
+    courses = list(course_student_map)
+    course_ids = {course: i for i, course in enumerate(courses)}
+    adjacency = [set() for _ in courses]
+    
+    # Group students by their set of courses so each distinct combination is expanded once
+    student_courses = defaultdict(list)
+    for course, info in course_student_map.items():
+        for reg_no in info['students']:
+            student_courses[reg_no].append(course_ids[course])
+    combinations = {tuple(sorted(set(ids))) for ids in student_courses.values() if len(ids) > 1}
+    for ids in combinations:
+        for i, a in enumerate(ids):
+            for b in ids[i + 1:]:
+                adjacency[a].add(b)
+                adjacency[b].add(a)
+    
+    # Same-year core/elective separation rule
+    by_year = defaultdict(lambda: {'core': [], 'elective': []})
+    for course, info in course_student_map.items():
+        by_year[info['year']][info['type']].append(course_ids[course])
+    for groups in by_year.values():
+        for a in groups['core']:
+            for b in groups['elective']:
+                adjacency[a].add(b)
+                adjacency[b].add(a)
+    
+    max_courses_per_student = max((len(set(ids)) for ids in student_courses.values()), default=0)
+    return courses, adjacency, max_courses_per_student
+
+def _pack_sessions(order, sizes, adjacency, capacity, min_sessions):
+    """Place courses in the given order into the first (or, with a minimum session count,
+    the least loaded) session with no conflict and enough seats"""
+    sessions = [{'courses': [], 'total': 0, 'largest': 0, 'banned': set()} for _ in range(min_sessions)]
+    
+    for c in order:
+        candidates = [
+            s for s in sessions
+            if c not in s['banned']
+            and session_seat_demand(s['total'] + sizes[c], max(s['largest'], sizes[c])) <= capacity
+        ]
+        if not candidates:
+            # Open a new session (a course too big for any room set still gets one of its own)
+            session = {'courses': [], 'total': 0, 'largest': 0, 'banned': set()}
+            sessions.append(session)
+        elif min_sessions:
+            session = min(candidates, key=lambda s: s['total'])
+        else:
+            session = candidates[0]
+        
+        session['courses'].append(c)
+        session['total'] += sizes[c]
+        session['largest'] = max(session['largest'], sizes[c])
+        session['banned'] |= adjacency[c]
+    
+    return sessions
+
+# Packing restarts of a seeded create_exam_sessions (counted, so the result is reproducible)
+SEEDED_RESTARTS = 200
+
+@instrumented('schedule', rows=lambda schedule: sum(len(courses) for courses in schedule.values()))
+def create_exam_sessions(course_student_map, num_sessions=None, classrooms=None, time_budget=2.0, seed=None,
+                         restarts=None):
+    """Create exam sessions that fit the classrooms and give no student two exams at once
+    
+    Courses are coloured on the student-conflict graph (which also encodes the rule that a
+    year's core and elective exams never share a session) and bin-packed against the seat
+    capacity. Randomised restarts run until the time budget is spent or the lower bound on
+    the number of sessions is reached; the fewest-session packing wins. num_sessions, when
+    given, is a minimum: courses are then spread over at least that many sessions.
+    
+    With a seed (or restarts) the restarts are counted instead of timed - restarts, default
+    SEEDED_RESTARTS - so the same seed always gives the same schedule.
+    """
+    if classrooms is None:
+        classrooms = CLASSROOMS
+    capacity = sum(classrooms.values())
+    rng = random.Random(seed) if seed is not None else random
+    if seed is not None and restarts is None:
+        restarts = SEEDED_RESTARTS
+    
+    courses, adjacency, max_courses_per_student = build_conflict_graph(course_student_map)
+    if not courses:
+        return {}
+    sizes = [len(course_student_map[c]['students']) for c in courses]
+    min_sessions = num_sessions or 0
+    
+    # No packing can beat the seat count or the busiest student's exam count
+    lower_bound = max(
+        min_sessions,
+        max_courses_per_student,
+        -(-sum(sizes) // capacity) if capacity else 0
+    )
+    
+    # Largest-degree, then largest-size first; restarts perturb this order
+    order = sorted(range(len(courses)), key=lambda c: (len(adjacency[c]), sizes[c]), reverse=True)
+    best = _pack_sessions(order, sizes, adjacency, capacity, min_sessions)
+    
+    deadline = time.perf_counter() + time_budget
+    attempts = 0
+    while len(best) > lower_bound and (attempts < restarts if restarts is not None else time.perf_counter() < deadline):
+        attempts += 1
+        order.sort(key=lambda c: (len(adjacency[c]) + 1) * (sizes[c] + 1) * rng.uniform(0.5, 1.5), reverse=True)
+        candidate = _pack_sessions(order, sizes, adjacency, capacity, min_sessions)
+        if len(candidate) < len(best):
+            best = candidate
+    
+    # Name sessions as before: core-only first, then elective-only, then mixed
+    kinds = []
+    for session in best:
+        types = {course_student_map[courses[c]]['type'] for c in session['courses']}
+        kind = 'Core' if types == {'core'} else 'Elective' if types == {'elective'} else 'Mixed'
+        kinds.append((kind, session['courses']))
+    kinds.sort(key=lambda item: ['Core', 'Elective', 'Mixed'].index(item[0]))
+    
+    return {
+        f"Session_{i+1}_{kind}": [courses[c] for c in session_courses]
+        for i, (kind, session_courses) in enumerate(kinds)
+        if session_courses
+    }
+
+# seating:    the plan (RegNo, Exam, Classroom, Desk, Position)
+# overflow:   students that did not fit in any room (RegNo, Exam) - never silently dropped
+# allocation: the RoomAllocation the plan was filled into
+SessionSeating = namedtuple('SessionSeating', ['seating', 'overflow', 'allocation'])
+
+@instrumented('seating', rows=lambda result: len(result.seating))
+def seat_session(course_student_map, session_courses, classrooms=None, strategy='best_fit', compact=False, seed=None):
+    """Seat one session into the rooms chosen by allocate_rooms
+    
+    Every desk takes the two exams with the most students left (max-heap), so the
+    dominant exam is paired against all the others and only its unavoidable excess
+    sits alone. Runs in O(N log E) and never mutates course_student_map. Students that
+    do not fit are returned in overflow. The plan is built as a SeatingPlan; seating is
+    that plan when compact=True, otherwise its DataFrame. A seed fixes the shuffle.
+    """
+    if classrooms is None:
+        classrooms = CLASSROOMS
+    rng = random.Random(seed) if seed is not None else random
+    
+    # Collect all students in this session by their exam (shuffled copies), numbered
+    # consecutively so a student is an int and an exam is a range of them
+    exams = []
+    students = []
+    offsets = []
+    
+    for course in session_courses:
+        if course in course_student_map:
+            students_list = course_student_map[course]['students']
+            if students_list:
+                exams.append(course)
+                offsets.append(len(students))
+                students.extend(rng.sample(students_list, len(students_list)))
+    
+    sizes = [stop - start for start, stop in zip(offsets, offsets[1:] + [len(students)])]
+    total = len(students)
+    largest = max(sizes, default=0)
+    seats_needed = session_seat_demand(total + total % 2, largest)
+    allocation = allocate_rooms(seats_needed, classrooms, strategy)
+    
+    # Max-heap of (-students remaining, exam index)
+    heap = [(-size, exam) for exam, size in enumerate(sizes)]
+    heapq.heapify(heap)
+    pointers = list(offsets)
+    
+    def take(entry):
+        remaining, exam = entry
+        student = pointers[exam]
+        pointers[exam] += 1
+        if remaining + 1 < 0:
+            heapq.heappush(heap, (remaining + 1, exam))
+        return student
+    
+    seat_student, seat_exam, seat_room, seat_desk, seat_right = [], [], [], [], []
+    room_names = []
+    opened = dict(allocation.rooms)
+    rooms = iter(allocation.rooms.items())
+    capacity = 0
+    seats_used = 0
+    desk_num = 0
+    
+    while heap:
+        # Per-room seat counter - move on when the room's allocated seats are used
+        if seats_used >= capacity:
+            next_room = next(rooms, None)
+            if next_room is None:
+                # Room edges can leave a few students over - spill into unopened rooms
+                remaining = [-entry[0] for entry in heap]
+                spare = {room: cap for room, cap in classrooms.items() if room not in opened}
+                extra = allocate_rooms(session_seat_demand(sum(remaining), max(remaining)), spare, strategy)
+                if not extra.rooms:
+                    break
+                opened.update(extra.rooms)
+                rooms = iter(extra.rooms.items())
+                continue
+            room_names.append(next_room[0])
+            capacity = next_room[1]
+            seats_used = 0
+            desk_num = 0
+            continue
+        
+        desk_num += 1
+        room = len(room_names) - 1
+        first = heapq.heappop(heap)
+        second = heapq.heappop(heap) if heap and capacity - seats_used >= 2 else None
+        
+        seat_student.append(take(first))
+        seat_exam.append(first[1])
+        seat_room.append(room)
+        seat_desk.append(desk_num)
+        seat_right.append(False)
+        if second is not None:
+            seat_student.append(take(second))
+            seat_exam.append(second[1])
+            seat_room.append(room)
+            seat_desk.append(desk_num)
+            seat_right.append(True)
+        
+        # A desk is used up even when only one seat is occupied
+        seats_used += min(2, capacity - seats_used)
+    
+    plan = SeatingPlan(students, exams, room_names, seat_student, seat_exam, seat_room, seat_desk, seat_right)
+    overflow = [
+        (students[student], exam)
+        for exam, pointer, stop in zip(exams, pointers, offsets[1:] + [total])
+        for student in range(pointer, stop)
+    ]
+    
+    return SessionSeating(
+        seating=plan if compact else plan.to_frame(),
+        overflow=pd.DataFrame(overflow, columns=['RegNo', 'Exam']),
+        allocation=allocation._replace(rooms=opened, overflow=seats_needed - min(seats_needed, sum(opened.values())))
+    )
+
+def generate_seating_for_session(students_df, course_student_map, session_courses, classrooms=None, strategy='best_fit',
+                                 seed=None):
+    """Generate seating for one session - mix years like the PDF
+    
+    Returns only the plan; use seat_session to also get the overflow and room allocation.
+    """
+    result = seat_session(course_student_map, session_courses, classrooms, strategy, seed=seed)
+    if len(result.overflow):
+        warnings.warn(f"{len(result.overflow)} students did not fit in the classrooms and were not seated")
+    return result.seating
+
+def session_seeds(schedule, seed):
+    """{session_name: seed} derived from one seed (all None without one), in schedule order"""
+    rng = random.Random(seed)
+    return {session_name: rng.randrange(2**31) if seed is not None else None for session_name in schedule}
+
+def _seat_session_job(job):
+    """Worker entry point: seat one session from its own slice of the course map"""
+    session_name, session_map, session_courses, classrooms, strategy, seed = job
+    return session_name, seat_session(session_map, session_courses, classrooms, strategy, compact=True, seed=seed)
+
+@instrumented('seat_all', rows=lambda plans: sum(len(plan.seating) for plan in plans.values()))
+def generate_all_seating(students_df, course_student_map, schedule, max_workers=None, classrooms=None, strategy='best_fit',
+                         compact=False, seed=None):
+    """Seat every session of a schedule in parallel, one process per session
+    
+    Returns {session_name: SessionSeating}. Workers send back compact SeatingPlans; with
+    compact=True they are kept that way (cheap to hold a whole week), otherwise each
+    seating is converted to its DataFrame. A seed gives every session its own fixed seed,
+    so the whole week is reproducible whatever the worker count.
+    """
+    seeds = session_seeds(schedule, seed)
+    
+    # Each worker only receives the courses of its own session
+    jobs = []
+    for session_name, courses in schedule.items():
+        session_map = {c: course_student_map[c] for c in courses if c in course_student_map}
+        jobs.append((session_name, session_map, courses, classrooms, strategy, seeds[session_name]))
+    
+    # Largest sessions first so the slowest one starts immediately
+    jobs.sort(key=lambda job: sum(len(info['students']) for info in job[1].values()), reverse=True)
+    
+    if max_workers == 1 or len(jobs) <= 1:
+        results = dict(map(_seat_session_job, jobs))
+    else:
+        with ProcessPoolExecutor(max_workers=max_workers) as pool:
+            results = dict(pool.map(_seat_session_job, jobs))
+    
+    # Keep the schedule's session order
+    if compact:
+        return {session_name: results[session_name] for session_name in schedule}
+    return {
+        session_name: results[session_name]._replace(seating=results[session_name].seating.to_frame())
+        for session_name in schedule
+    }
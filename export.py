@@ -0,0 +1,157 @@
+"""Bulk export of every session's seating - ZIP of per-room CSVs, one Parquet file, PDF sheets
+
+All writers stream: rooms are rendered and written one at a time, so only the current
+room's output is ever held in memory. plans is {session_name: seating DataFrame} (a
+SeatingPlan, or a SessionSeating from seat_session/generate_all_seating, works too).
+"""
+import csv
+import io
+import zipfile
+
+from seatplan import SEATING_COLUMNS, as_frame
+
+
+def iter_rooms(plans):
+    """Yield (session_name, room, rows) with rows as SEATING_COLUMNS tuples sorted by desk and position"""
+    for session_name, plan in plans.items():
+        seating = as_frame(plan)
+        if seating.empty:
+            continue
+        seating = seating.sort_values(['Classroom', 'Desk', 'Position'], kind='stable')
+        rows = list(seating[SEATING_COLUMNS].itertuples(index=False, name=None))
+        start = 0
+        for stop in range(1, len(rows) + 1):
+            if stop == len(rows) or rows[stop][2] != rows[start][2]:
+                yield session_name, rows[start][2], rows[start:stop]
+                start = stop
+
+def export_zip(plans, target):
+    """Write session/room.csv entries into a ZIP archive (path or binary file object)"""
+    rooms = 0
+    with zipfile.ZipFile(target, 'w', compression=zipfile.ZIP_DEFLATED) as archive:
+        for session_name, room, rows in iter_rooms(plans):
+            with archive.open(f"{session_name}/{room}.csv", 'w') as entry:
+                with io.TextIOWrapper(entry, encoding='utf-8', newline='') as text:
+                    writer = csv.writer(text, lineterminator='\n')
+                    writer.writerow(SEATING_COLUMNS)
+                    writer.writerows(rows)
+            rooms += 1
+    return rooms
+
+def export_parquet(plans, target):
+    """Write every session into one Parquet file with a Session column (one row group per session)"""
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise ImportError("Writing Parquet requires pyarrow (pip install pyarrow)")
+
+    schema = pa.schema([
+        ('Session', pa.string()), ('RegNo', pa.string()), ('Exam', pa.string()),
+        ('Classroom', pa.string()), ('Desk', pa.int32()), ('Position', pa.string())
+    ])
+    rows = 0
+    with pq.ParquetWriter(target, schema) as writer:
+        for session_name, plan in plans.items():
+            seating = as_frame(plan)
+            if seating.empty:
+                continue
+            table = pa.Table.from_pandas(
+                seating[SEATING_COLUMNS].assign(Session=session_name)[schema.names],
+                schema=schema, preserve_index=False
+            )
+            writer.write_table(table)
+            rows += len(seating)
+    return rows
+
+class _PdfWriter:
+    """Minimal streaming PDF writer: monospaced text pages, written as they are added"""
+
+    PAGE_WIDTH, PAGE_HEIGHT = 595, 842   # A4 in points
+    MARGIN, LEADING, FONT_SIZE = 50, 14, 10
+
+    def __init__(self, out):
+        self.out = out
+        self.offsets = {}
+        self.page_ids = []
+        self.position = 0
+        self._write(b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n")
+        # 1 = catalog, 2 = page tree, 3 = font; the tree is written last, once all pages are known
+        self._object(3, b"<< /Type /Font /Subtype /Type1 /BaseFont /Courier >>")
+        self.next_id = 4
+
+    @property
+    def lines_per_page(self):
+        return (self.PAGE_HEIGHT - 2 * self.MARGIN) // self.LEADING
+
+    def _write(self, data):
+        self.out.write(data)
+        self.position += len(data)
+
+    def _object(self, object_id, body):
+        self.offsets[object_id] = self.position
+        self._write(f"{object_id} 0 obj\n".encode() + body + b"\nendobj\n")
+
+    @staticmethod
+    def _escape(text):
+        return text.replace('\\', '\\\\').replace('(', '\\(').replace(')', '\\)').encode('latin-1', 'replace')
+
+    def add_page(self, lines):
+        stream = [f"BT /F1 {self.FONT_SIZE} Tf {self.LEADING} TL {self.MARGIN} {self.PAGE_HEIGHT - self.MARGIN} Td".encode()]
+        for line in lines:
+            stream.append(b"(" + self._escape(line) + b") Tj T*")
+        stream.append(b"ET")
+        content = b"\n".join(stream)
+
+        content_id, page_id = self.next_id, self.next_id + 1
+        self.next_id += 2
+        self._object(content_id, f"<< /Length {len(content)} >>\nstream\n".encode() + content + b"\nendstream")
+        self._object(page_id, (
+            f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 {self.PAGE_WIDTH} {self.PAGE_HEIGHT}] "
+            f"/Resources << /Font << /F1 3 0 R >> >> /Contents {content_id} 0 R >>"
+        ).encode())
+        self.page_ids.append(page_id)
+
+    def close(self):
+        kids = " ".join(f"{page_id} 0 R" for page_id in self.page_ids)
+        self._object(2, f"<< /Type /Pages /Kids [{kids}] /Count {len(self.page_ids)} >>".encode())
+        self._object(1, b"<< /Type /Catalog /Pages 2 0 R >>")
+
+        xref_offset = self.position
+        entries = [b"0000000000 65535 f \n"] + [
+            f"{self.offsets[object_id]:010d} 00000 n \n".encode() for object_id in range(1, self.next_id)
+        ]
+        self._write(f"xref\n0 {self.next_id}\n".encode() + b"".join(entries))
+        self._write(f"trailer\n<< /Size {self.next_id} /Root 1 0 R >>\nstartxref\n{xref_offset}\n%%EOF\n".encode())
+
+def room_sheet_lines(session_name, room, rows):
+    """Printable lines of one room's seating sheet"""
+    desks = {}
+    for reg_no, exam, _, desk, position in rows:
+        desks.setdefault(desk, {})[position] = f"{reg_no} | {exam}"
+
+    lines = [f"{session_name} - {room}", f"{len(rows)} students", ""]
+    lines.append(f"{'Desk':>5}  {'Left':<32} {'Right':<32}")
+    for desk, seats in desks.items():
+        lines.append(f"{desk:>5}  {seats.get('Left', '---'):<32} {seats.get('Right', '---'):<32}")
+    return lines
+
+def export_pdf(plans, target):
+    """Paginated seating sheets, one or more pages per room (path or binary file object)"""
+    owns_file = isinstance(target, (str, bytes)) or hasattr(target, '__fspath__')
+    out = open(target, 'wb') if owns_file else target
+    try:
+        pdf = _PdfWriter(out)
+        for session_name, room, rows in iter_rooms(plans):
+            lines = room_sheet_lines(session_name, room, rows)
+            header, body = lines[:4], lines[4:]
+            per_page = pdf.lines_per_page - len(header)
+            for start in range(0, max(len(body), 1), per_page):
+                pdf.add_page(header + body[start:start + per_page])
+        pdf.close()
+        return len(pdf.page_ids)
+    finally:
+        if owns_file:
+            out.close()
+
+EXPORTERS = {'zip': export_zip, 'parquet': export_parquet, 'pdf': export_pdf}
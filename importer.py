@@ -0,0 +1,248 @@
+"""Registrar import - students, enrolments, course catalogue and rooms from CSV exports
+
+Files are read in chunks and validated with vectorised masks as they stream in. Bad rows
+are skipped and collected into one error report (File, Line, Column, Value, Error)
+instead of stopping at the first problem.
+
+    students.csv    RegNo, Year, Branch, Section, BranchCode[, Elective]
+    enrolments.csv  RegNo, Course
+    catalogue.csv   Course, Year, Type (core/elective), BranchCode[, Merge]
+                    a core row per section taking it; Merge names the section it is merged with
+    rooms.csv       Room, Capacity
+"""
+from collections import namedtuple
+
+from catalog import file_digest, load_catalog
+from core import build_course_incidence, build_course_student_map
+from instrument import instrumented
+from lazy import LazyModule
+
+pd = LazyModule('pandas')
+
+# students:     DataFrame in the shape of generate_student_database
+# course_map:   {course: {'students', 'year', 'type'}} as from build_course_student_map
+# core_courses: {year: {branch: [{'code', 'merge'}]}} as CORE_COURSES
+# electives:    {year: [codes]}
+# classrooms:   {room: capacity} (None when no rooms file was given)
+# errors:       DataFrame with one row per rejected value
+RegistrarData = namedtuple('RegistrarData', ['students', 'course_map', 'core_courses', 'electives', 'classrooms', 'errors'])
+
+ERROR_COLUMNS = ['File', 'Line', 'Column', 'Value', 'Error']
+CHUNK_SIZE = 200_000
+
+
+class _ErrorLog:
+    def __init__(self):
+        self.frames = []
+
+    def add(self, name, chunk, mask, column, error, lines=None):
+        """Record the rows of chunk where mask is True; returns mask for chaining
+
+        Lines default to the chunk's row index (read_csv numbers rows across chunks).
+        """
+        if mask.any():
+            bad = chunk[mask]
+            self.frames.append(pd.DataFrame({
+                'File': name,
+                'Line': (bad.index if lines is None else lines[mask]) + 2,   # header is line 1
+                'Column': column,
+                'Value': bad[column].astype(str) if column in bad else '',
+                'Error': error
+            }))
+        return mask
+
+    def frame(self):
+        if not self.frames:
+            return pd.DataFrame(columns=ERROR_COLUMNS)
+        return pd.concat(self.frames, ignore_index=True).sort_values(['File', 'Line'], kind='stable', ignore_index=True)
+
+def _name(path):
+    """File name for the error report (paths or uploaded file objects)"""
+    return str(getattr(path, 'name', path))
+
+def _read_chunks(path, required, errors, chunk_size):
+    """Yield string-typed chunks of a CSV; a missing required column is one error for the file"""
+    name = _name(path)
+    header = pd.read_csv(path, nrows=0).columns
+    if hasattr(path, 'seek'):
+        path.seek(0)
+    missing = [column for column in required if column not in header]
+    if missing:
+        errors.frames.append(pd.DataFrame([{
+            'File': name, 'Line': 1, 'Column': column, 'Value': '', 'Error': "Missing required column"
+        } for column in missing]))
+        return
+
+    for chunk in pd.read_csv(path, dtype=str, keep_default_na=False, chunksize=chunk_size):
+        for column in chunk.columns:
+            chunk[column] = chunk[column].str.strip()
+        yield chunk
+
+def _int_column(chunk, column):
+    """Column as integers, with NaN where the value is not a whole number"""
+    return pd.to_numeric(chunk[column], errors='coerce').where(lambda v: v == v.round())
+
+def read_students(path, errors, elective_codes=None, chunk_size=CHUNK_SIZE):
+    name = _name(path)
+    seen = set()
+    frames = []
+    for chunk in _read_chunks(path, ['RegNo', 'Year', 'Branch', 'BranchCode'], errors, chunk_size):
+        years = _int_column(chunk, 'Year')
+        bad = errors.add(name, chunk, chunk['RegNo'] == '', 'RegNo', "Empty RegNo")
+        bad |= errors.add(name, chunk, ~bad & (years.isna() | (years < 1)), 'Year', "Year must be a positive integer")
+        bad |= errors.add(name, chunk, ~bad & (chunk['BranchCode'] == ''), 'BranchCode', "Empty BranchCode")
+        duplicate = chunk['RegNo'].duplicated() | chunk['RegNo'].isin(seen)
+        bad |= errors.add(name, chunk, ~bad & duplicate, 'RegNo', "Duplicate RegNo")
+        if elective_codes is not None and 'Elective' in chunk:
+            unknown = (chunk['Elective'] != '') & ~chunk['Elective'].isin(elective_codes)
+            bad |= errors.add(name, chunk, ~bad & unknown, 'Elective', "Elective not in catalogue")
+
+        good = chunk[~bad].assign(Year=years[~bad].astype('int64'))
+        seen.update(good['RegNo'])
+        frames.append(good)
+
+    columns = ['RegNo', 'Year', 'Branch', 'Section', 'BranchCode', 'Elective']
+    if not frames:
+        return pd.DataFrame(columns=columns)
+    students = pd.concat(frames, ignore_index=True)
+    for column in ['Section', 'Elective']:
+        if column not in students:
+            students[column] = ''
+    return students[columns]
+
+def read_catalogue(path, errors, chunk_size=CHUNK_SIZE):
+    """Catalogue rows -> (core_courses, electives, {course: (year, type)})"""
+    name = _name(path)
+    core_rows = []   # (line, year, code, BranchCode, merge)
+    electives = {}
+    courses = {}
+
+    for chunk in _read_chunks(path, ['Course', 'Year', 'Type'], errors, chunk_size):
+        if 'BranchCode' not in chunk:
+            chunk['BranchCode'] = ''
+        if 'Merge' not in chunk:
+            chunk['Merge'] = ''
+        chunk['Type'] = chunk['Type'].str.lower()
+        years = _int_column(chunk, 'Year')
+
+        bad = errors.add(name, chunk, chunk['Course'] == '', 'Course', "Empty course code")
+        bad |= errors.add(name, chunk, ~bad & (years.isna() | (years < 1)), 'Year', "Year must be a positive integer")
+        bad |= errors.add(name, chunk, ~bad & ~chunk['Type'].isin(['core', 'elective']), 'Type', "Type must be core or elective")
+        bad |= errors.add(name, chunk, ~bad & (chunk['Type'] == 'core') & (chunk['BranchCode'] == ''),
+                          'BranchCode', "Core course needs the BranchCode taking it")
+
+        # A course code keeps one year and type across the whole catalogue: the first valid
+        # row of a code, in earlier chunks or this one, decides
+        first = chunk[~bad].assign(Year=years[~bad]).drop_duplicates('Course')
+        first = first[~first['Course'].isin(list(courses))]
+        reference = {**dict(zip(first['Course'], zip(first['Year'], first['Type']))), **courses}
+        known_year = chunk['Course'].map(lambda code: reference.get(code, (None, None))[0])
+        known_type = chunk['Course'].map(lambda code: reference.get(code, (None, None))[1])
+        conflict = known_year.notna() & ((known_year != years) | (known_type != chunk['Type']))
+        bad |= errors.add(name, chunk, ~bad & conflict, 'Course', "Course listed with another year or type")
+
+        good = chunk[~bad].assign(Year=years[~bad].astype('int64'))
+        for code, year, course_type, branch_code, merge, line in zip(
+            good['Course'], good['Year'], good['Type'], good['BranchCode'], good['Merge'], good.index + 2
+        ):
+            courses.setdefault(code, (year, course_type))
+            if course_type == 'core':
+                core_rows.append((line, year, code, branch_code, merge))
+            elif code not in electives.setdefault(year, []):
+                electives[year].append(code)
+
+    # Merge targets must be sections of the same year; a rejected row can take the last
+    # core course of a section with it, so repeat until no merge is left dangling
+    while True:
+        sections = {(year, branch_code) for _, year, _, branch_code, _ in core_rows}
+        dangling = [row for row in core_rows if row[4] and (row[1], row[4]) not in sections]
+        if not dangling:
+            break
+        errors.frames.append(pd.DataFrame([{
+            'File': name, 'Line': line, 'Column': 'Merge', 'Value': merge,
+            'Error': f"Merged section has no core courses in year {year}"
+        } for line, year, _, _, merge in dangling]))
+        core_rows = [row for row in core_rows if row not in dangling]
+
+    core_courses = {}
+    for _, year, code, branch_code, merge in core_rows:
+        core_courses.setdefault(year, {}).setdefault(branch_code, []).append({'code': code, 'merge': merge})
+    kept = {code for _, _, code, _, _ in core_rows} | {code for codes in electives.values() for code in codes}
+    return core_courses, electives, {code: info for code, info in courses.items() if code in kept}
+
+def read_enrolments(path, errors, known_students, courses, chunk_size=CHUNK_SIZE):
+    name = _name(path)
+    known_students = pd.Index(known_students)
+    known_courses = pd.Index(list(courses))
+    frames = []
+    for chunk in _read_chunks(path, ['RegNo', 'Course'], errors, chunk_size):
+        # Hash lookups against the indexes; isin would rebuild the student set for every chunk
+        unknown_student = known_students.get_indexer(chunk['RegNo']) < 0
+        unknown_course = known_courses.get_indexer(chunk['Course']) < 0
+        bad = errors.add(name, chunk, unknown_student, 'RegNo', "Unknown student")
+        bad |= errors.add(name, chunk, ~bad & unknown_course, 'Course', "Course not in catalogue")
+        frames.append(pd.DataFrame({
+            'RegNo': pd.Categorical(chunk.loc[~bad, 'RegNo']),
+            'Course': pd.Categorical(chunk.loc[~bad, 'Course']),
+            'Line': chunk.index[~bad] + 2
+        }))
+
+    if not frames:
+        return pd.DataFrame(columns=['RegNo', 'Course', 'Line'])
+    enrolments = pd.concat(frames, ignore_index=True)
+    enrolments['RegNo'] = enrolments['RegNo'].astype(str)
+    enrolments['Course'] = enrolments['Course'].astype(str)
+
+    duplicate = enrolments.duplicated(['RegNo', 'Course'])
+    errors.add(name, enrolments, duplicate, 'Course', "Duplicate enrolment", lines=enrolments['Line'] - 2)
+    return enrolments[~duplicate]
+
+def read_rooms(path, errors, chunk_size=CHUNK_SIZE):
+    name = _name(path)
+    classrooms = {}
+    for chunk in _read_chunks(path, ['Room', 'Capacity'], errors, chunk_size):
+        capacities = _int_column(chunk, 'Capacity')
+        bad = errors.add(name, chunk, chunk['Room'] == '', 'Room', "Empty room name")
+        bad |= errors.add(name, chunk, ~bad & (capacities.isna() | (capacities <= 0)), 'Capacity', "Capacity must be a positive integer")
+        duplicate = chunk['Room'].duplicated() | chunk['Room'].isin(list(classrooms))
+        bad |= errors.add(name, chunk, ~bad & duplicate, 'Room', "Duplicate room")
+        classrooms.update(zip(chunk.loc[~bad, 'Room'], capacities[~bad].astype(int)))
+    return classrooms
+
+@instrumented('import', rows=lambda data: len(data.students))
+def import_registrar(students_path, catalogue_path, enrolments_path=None, rooms_path=None, chunk_size=CHUNK_SIZE):
+    """Import registrar exports into the structures the planning pipeline consumes
+
+    With an enrolments file the course map comes straight from it; otherwise it is derived
+    from the catalogue (core courses by section, merged sections included) and the
+    students' Elective column, exactly like build_course_student_map.
+    """
+    errors = _ErrorLog()
+    core_courses, electives, courses = read_catalogue(catalogue_path, errors, chunk_size)
+    elective_codes = [code for code, (_, course_type) in courses.items() if course_type == 'elective']
+    students = read_students(students_path, errors, elective_codes, chunk_size)
+
+    if enrolments_path:
+        enrolments = read_enrolments(enrolments_path, errors, students['RegNo'], courses, chunk_size)
+
+        # Elective column for the rest of the pipeline: each student's first elective enrolment
+        course_type = enrolments['Course'].map({code: course_type for code, (_, course_type) in courses.items()})
+        first_elective = enrolments[course_type == 'elective'].drop_duplicates('RegNo')
+        students['Elective'] = students['RegNo'].map(dict(zip(first_elective['RegNo'], first_elective['Course']))).fillna('')
+
+        course_map = {
+            code: {'students': group.tolist(), 'year': int(courses[code][0]), 'type': courses[code][1]}
+            for code, group in enrolments.groupby('Course', sort=False)['RegNo']
+        }
+    else:
+        # Compiled once per catalogue file (and cached on disk by its digest); the incidence
+        # build below finds it by the tables' identity
+        load_catalog(core_courses, electives, source=file_digest(catalogue_path))
+        course_map = build_course_student_map(students, build_course_incidence(students, core_courses))
+
+    classrooms = read_rooms(rooms_path, errors, chunk_size) if rooms_path else None
+
+    return RegistrarData(
+        students=students, course_map=course_map, core_courses=core_courses,
+        electives=electives, classrooms=classrooms, errors=errors.frame()
+    )
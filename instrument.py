@@ -0,0 +1,136 @@
+"""Per-stage instrumentation - wall time, row counts and peak memory, as JSON log lines
+
+Off by default and close to free when off: stage() hands back a shared no-op context
+and instrumented() wrappers make one flag check before calling straight through.
+
+    EXAM_INSTRUMENT=1        record every stage (also enable() at runtime)
+    EXAM_PROFILE_DIR=path    also dump a cProfile file per outermost stage
+
+Records are kept in memory (records()) for the UI panel and logged to the
+'exam.instrument' logger as one JSON object per stage.
+"""
+import cProfile
+import functools
+import itertools
+import json
+import logging
+import os
+import time
+import tracemalloc
+from collections import deque
+
+logger = logging.getLogger('exam.instrument')
+
+_state = {
+    'enabled': os.environ.get('EXAM_INSTRUMENT', '') not in ('', '0'),
+    'profile_dir': os.environ.get('EXAM_PROFILE_DIR') or None,
+}
+_records = deque(maxlen=500)
+_stack = []
+_dump_ids = itertools.count(1)
+
+
+class _NullStage:
+    """Stand-in when instrumentation is off; accepts rows like a real stage"""
+    rows = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+_NULL_STAGE = _NullStage()
+
+class _Stage:
+    def __init__(self, name, rows):
+        self.name = name
+        self.rows = rows
+        self.peak = 0
+        self.profiler = None
+
+    def __enter__(self):
+        # Trace allocations only while a stage runs (unless someone else already is)
+        self.owns_tracing = not tracemalloc.is_tracing()
+        if self.owns_tracing:
+            tracemalloc.start()
+        if _stack:
+            # Keep the parent's peak so far before resetting it for this stage
+            _stack[-1].peak = max(_stack[-1].peak, tracemalloc.get_traced_memory()[1])
+        tracemalloc.reset_peak()
+        self.start_memory = tracemalloc.get_traced_memory()[0]
+
+        if _state['profile_dir'] and not _stack:
+            self.profiler = cProfile.Profile()
+            self.profiler.enable()
+        _stack.append(self)
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        seconds = time.perf_counter() - self.start
+        _stack.pop()
+        peak = max(self.peak, tracemalloc.get_traced_memory()[1])
+        if _stack:
+            _stack[-1].peak = max(_stack[-1].peak, peak)
+
+        record = {
+            'stage': self.name,
+            'seconds': round(seconds, 6),
+            'rows': self.rows,
+            'peak_bytes': max(0, peak - self.start_memory),
+            'depth': len(_stack),
+            'ok': exc_type is None,
+            'time': time.time(),
+        }
+        if self.profiler is not None:
+            self.profiler.disable()
+            os.makedirs(_state['profile_dir'], exist_ok=True)
+            path = os.path.join(_state['profile_dir'], f"{self.name}-{os.getpid()}-{next(_dump_ids)}.prof")
+            self.profiler.dump_stats(path)
+            record['profile'] = path
+
+        _records.append(record)
+        logger.info(json.dumps(record))
+        if self.owns_tracing:
+            tracemalloc.stop()
+        return False
+
+def enabled():
+    return _state['enabled']
+
+def profile_dir():
+    return _state['profile_dir']
+
+def enable(on=True, profile_dir=None):
+    """Switch instrumentation on/off at runtime; profile_dir turns on cProfile dumps"""
+    _state['enabled'] = on
+    _state['profile_dir'] = profile_dir
+
+def stage(name, rows=None):
+    """Context manager timing one stage; set .rows on it once the count is known"""
+    if not _state['enabled']:
+        return _NULL_STAGE
+    return _Stage(name, rows)
+
+def instrumented(name, rows=None):
+    """Decorator recording every call as stage name; rows(result) gives the row count"""
+    def decorate(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not _state['enabled']:
+                return func(*args, **kwargs)
+            with _Stage(name, None) as current:
+                result = func(*args, **kwargs)
+                if rows is not None:
+                    current.rows = rows(result)
+            return result
+        return wrapper
+    return decorate
+
+def records():
+    """Recorded stages, oldest first"""
+    return list(_records)
+
+def clear():
+    _records.clear()
@@ -0,0 +1,261 @@
+"""Room geometry and adjacency-aware seating
+
+A room is a grid of rows x desk columns; every desk has a Left and a Right seat, so a row
+holds 2 x columns seats. Desks are numbered row by row from the front, which keeps the
+Desk/Position plan format: desk d sits in row (d - 1) // columns, desk column
+(d - 1) % columns. Layouts come from a file (Room, Rows, Columns) or are derived from the
+capacity with DESK_COLUMNS desks per row.
+
+Adjacency-aware seating keeps an exam out of every seat next to one of its own students:
+left/right (also across neighbouring desks) and front/back.
+"""
+import csv
+import heapq
+import io
+import json
+import random
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+
+from core import CLASSROOMS, SessionSeating, session_seat_demand, session_seeds
+from instrument import instrumented
+from lazy import LazyModule
+from rooms import allocate_rooms
+from seatplan import SeatingPlan
+
+np = LazyModule('numpy')
+pd = LazyModule('pandas')
+
+DESK_COLUMNS = 3
+
+# rows, columns: desks front to back and across
+# seats:         usable seats (capacity; the last desk of an odd room has one)
+RoomLayout = namedtuple('RoomLayout', ['rows', 'columns', 'seats'])
+
+# SessionSeating plus relaxed: same-exam neighbour pairs that could not be avoided
+LayoutSeating = namedtuple('LayoutSeating', SessionSeating._fields + ('relaxed',))
+
+
+def room_layout(capacity, columns=DESK_COLUMNS):
+    """Fewest rows of columns desks that hold capacity seats"""
+    desks = -(-capacity // 2)
+    columns = max(1, min(columns, desks))
+    return RoomLayout(rows=-(-desks // columns), columns=columns, seats=capacity)
+
+def load_layouts(path):
+    """Load {room: RoomLayout} from a CSV (Room, Rows, Columns[, Seats]) or a JSON object
+    {room: {"rows", "columns"[, "seats"]}}; seats default to every seat of the grid.
+    path may also be an uploaded (binary) file object with a name."""
+    name = str(getattr(path, 'name', path))
+    if hasattr(path, 'read'):
+        text = path.read()
+        f = io.StringIO(text.decode('utf-8') if isinstance(text, bytes) else text)
+    else:
+        f = open(path, newline='')
+    with f:
+        if name.endswith('.json'):
+            rows = [(room, spec['rows'], spec['columns'], spec.get('seats')) for room, spec in json.load(f).items()]
+        else:
+            rows = [(r['Room'], r['Rows'], r['Columns'], r.get('Seats')) for r in csv.DictReader(f)]
+
+    layouts = {}
+    for room, n_rows, n_columns, seats in rows:
+        room = str(room).strip()
+        n_rows, n_columns = int(n_rows), int(n_columns)
+        seats = int(seats) if seats not in (None, '') else 2 * n_rows * n_columns
+        if not room or n_rows <= 0 or n_columns <= 0 or not 0 < seats <= 2 * n_rows * n_columns:
+            raise ValueError(f"Invalid layout entry: {room!r} with {n_rows} rows, {n_columns} columns, {seats} seats")
+        layouts[room] = RoomLayout(n_rows, n_columns, seats)
+    return layouts
+
+def resolve_layouts(classrooms, layouts=None):
+    """{room: RoomLayout} for every classroom; rooms missing from layouts are derived from capacity"""
+    layouts = layouts or {}
+    return {
+        room: layouts[room]._replace(seats=min(layouts[room].seats, capacity)) if room in layouts else room_layout(capacity)
+        for room, capacity in classrooms.items()
+    }
+
+def _earlier_neighbours(layout):
+    """Per seat (row-major over Left/Right seats): the already-filled neighbours, left and front"""
+    width = 2 * layout.columns
+    neighbours = []
+    for cell in range(layout.seats):
+        row, seat = divmod(cell, width)
+        neighbours.append(tuple(n for n in (cell - 1 if seat else -1, cell - width if row else -1) if n >= 0))
+    return neighbours
+
+@instrumented('seating_layout', rows=lambda result: len(result.seating))
+def seat_session_layout(course_student_map, session_courses, classrooms=None, layouts=None, strategy='best_fit',
+                        compact=False, seed=None):
+    """Seat one session so no student has a same-exam neighbour in front, behind or beside
+
+    Seats are filled front to back, row by row. Each seat takes the exam with the most
+    students left that is not already next to it (max-heap, skipping blocked exams),
+    unless an exam has more students left than there are desks after this one - that
+    exam takes the seat, so the layout never overflows where plain seating fits.
+    A seat with no allowed exam stays empty while the rooms still have spare seats;
+    otherwise the front/back or across-desk constraint is relaxed for that seat (two
+    students of one exam never share a desk). Returns LayoutSeating, with relaxed = the
+    number of same-exam neighbour pairs this forced. A seed fixes the shuffle.
+    """
+    if classrooms is None:
+        classrooms = CLASSROOMS
+    rng = random.Random(seed) if seed is not None else random
+    layouts = resolve_layouts(classrooms, layouts)
+
+    exams, students, offsets = [], [], []
+    for course in session_courses:
+        students_list = course_student_map.get(course, {}).get('students')
+        if students_list:
+            exams.append(course)
+            offsets.append(len(students))
+            students.extend(rng.sample(students_list, len(students_list)))
+    sizes = [stop - start for start, stop in zip(offsets, offsets[1:] + [len(students)])]
+    total = len(students)
+
+    seats_needed = session_seat_demand(total, max(sizes, default=0))
+    allocation = allocate_rooms(seats_needed, {room: layout.seats for room, layout in layouts.items()}, strategy)
+
+    heap = [(-size, exam) for exam, size in enumerate(sizes)]
+    heapq.heapify(heap)
+    pointers = list(offsets)
+    remaining = total
+
+    seat_student, seat_exam, seat_room, seat_desk, seat_right = [], [], [], [], []
+    room_names = []
+    opened = dict(allocation.rooms)
+    queue = list(allocation.rooms.items())
+    relaxed = 0
+
+    while heap and queue:
+        for index, (room, share) in enumerate(queue):
+            if not heap:
+                break
+            layout = layouts[room]
+            neighbours = _earlier_neighbours(layout)
+            later_seats = sum(layouts[r].seats for r, _ in queue[index + 1:])
+            later_desks = sum(-(-layouts[r].seats // 2) for r, _ in queue[index + 1:])
+            room_desks = -(-layout.seats // 2)
+            room_id = len(room_names)
+            room_names.append(room)
+            cells = [-1] * layout.seats
+            filled = 0
+
+            for cell in range(layout.seats):
+                # The room's share is seated and the rooms after it hold everyone left
+                if not heap or filled >= share and later_seats >= remaining and -heap[0][0] <= later_desks:
+                    break
+                seats_after = layout.seats - cell - 1 + later_seats
+                desks_after = room_desks - cell // 2 - 1 + later_desks
+                partner = cells[cell - 1] if cell % 2 else -1
+
+                # An exam with more students left than the desks after this one must take this
+                # seat, or two of its students would end up sharing a desk (or overflow)
+                urgent = min((item for item in heap[:3] if item[1] != partner), default=None)
+                if urgent is not None and -urgent[0] > desks_after:
+                    blocked = [cells[n] for n in neighbours[cell]]
+                    heap.remove(urgent)
+                    heapq.heapify(heap)
+                    entry = urgent
+                    relaxed += blocked.count(entry[1])
+                else:
+                    # Largest exam that is not already beside or in front of this seat
+                    blocked = [cells[n] for n in neighbours[cell]]
+                    skipped = []
+                    entry = heapq.heappop(heap)
+                    while entry[1] in blocked and heap:
+                        skipped.append(entry)
+                        entry = heapq.heappop(heap)
+                    if entry[1] in blocked:
+                        skipped.append(entry)
+                        # Relax front/back or across-desk neighbours only, and only when every later
+                        # seat is needed; the same desk never holds one exam twice
+                        allowed = [item for item in skipped if item[1] != partner]
+                        if seats_after >= remaining or not allowed:
+                            for item in skipped:
+                                heapq.heappush(heap, item)
+                            continue   # leave the seat empty
+                        entry = min(allowed)   # the largest exam that may sit here
+                        skipped.remove(entry)
+                        relaxed += blocked.count(entry[1])
+                    for item in skipped:
+                        heapq.heappush(heap, item)
+
+                count, exam = entry
+                if count + 1 < 0:
+                    heapq.heappush(heap, (count + 1, exam))
+                cells[cell] = exam
+                row, seat = divmod(cell, 2 * layout.columns)
+                seat_student.append(pointers[exam])
+                seat_exam.append(exam)
+                seat_room.append(room_id)
+                seat_desk.append(row * layout.columns + seat // 2 + 1)
+                seat_right.append(seat % 2 == 1)
+                pointers[exam] += 1
+                remaining -= 1
+                filled += 1
+
+        if heap:
+            # Room edges and empty seats can leave students over - spill into unopened rooms
+            left = [-entry[0] for entry in heap]
+            spare = {room: layout.seats for room, layout in layouts.items() if room not in opened}
+            extra = allocate_rooms(session_seat_demand(sum(left), max(left)), spare, strategy)
+            opened.update(extra.rooms)
+            queue = list(extra.rooms.items())
+
+    plan = SeatingPlan(students, exams, room_names, seat_student, seat_exam, seat_room, seat_desk, seat_right)
+    overflow = [
+        (students[student], exam)
+        for exam, pointer, stop in zip(exams, pointers, offsets[1:] + [total])
+        for student in range(pointer, stop)
+    ]
+
+    return LayoutSeating(
+        seating=plan if compact else plan.to_frame(),
+        overflow=pd.DataFrame(overflow, columns=['RegNo', 'Exam']),
+        allocation=allocation._replace(rooms=opened, overflow=seats_needed - min(seats_needed, sum(opened.values()))),
+        relaxed=relaxed
+    )
+
+def _seat_layout_job(job):
+    """Worker entry point: seat one session with its layouts from its own slice of the course map"""
+    session_name, session_map, session_courses, classrooms, layouts, strategy, seed = job
+    return session_name, seat_session_layout(session_map, session_courses, classrooms, layouts, strategy, compact=True,
+                                             seed=seed)
+
+@instrumented('seat_all_layout', rows=lambda plans: sum(len(plan.seating) for plan in plans.values()))
+def generate_all_layout_seating(course_student_map, schedule, layouts=None, max_workers=None, classrooms=None,
+                                strategy='best_fit', compact=False, seed=None):
+    """seat_session_layout for every session of a schedule, in parallel like core.generate_all_seating
+
+    Returns {session_name: LayoutSeating} in schedule order; the same seed gives the same
+    plans whatever the worker count.
+    """
+    seeds = session_seeds(schedule, seed)
+    jobs = []
+    for session_name, courses in schedule.items():
+        session_map = {c: course_student_map[c] for c in courses if c in course_student_map}
+        jobs.append((session_name, session_map, courses, classrooms, layouts, strategy, seeds[session_name]))
+    jobs.sort(key=lambda job: sum(len(info['students']) for info in job[1].values()), reverse=True)
+
+    if max_workers == 1 or len(jobs) <= 1:
+        results = dict(map(_seat_layout_job, jobs))
+    else:
+        with ProcessPoolExecutor(max_workers=max_workers) as pool:
+            results = dict(pool.map(_seat_layout_job, jobs))
+
+    if compact:
+        return {session_name: results[session_name] for session_name in schedule}
+    return {
+        session_name: results[session_name]._replace(seating=results[session_name].seating.to_frame())
+        for session_name in schedule
+    }
+
+def seat_cells(seating, layouts):
+    """Row and seat column (0-based, across Left/Right seats) of every row of a seating plan"""
+    columns = seating['Classroom'].map({room: layout.columns for room, layout in layouts.items()}).to_numpy(dtype=float)
+    desk = seating['Desk'].to_numpy(dtype=float) - 1
+    row = np.floor_divide(desk, columns)
+    seat = 2 * (desk - row * columns) + (seating['Position'] == 'Right').to_numpy()
+    return row, seat
@@ -0,0 +1,24 @@
+"""Deferred imports for the heavy libraries, so importing the planning modules stays cheap
+
+    np = LazyModule('numpy')
+
+behaves like the module once touched; until then nothing is imported. CLI runs, worker
+processes and the lookup service only pay for numpy/pandas if they actually use them.
+"""
+import importlib
+
+
+class LazyModule:
+    """Module stand-in that imports the real module on first attribute access"""
+
+    def __init__(self, name):
+        self.__dict__['_name'] = name
+
+    def __getattr__(self, attr):
+        module = importlib.import_module(self._name)
+        # Copy the namespace so later lookups are plain instance-dict hits
+        self.__dict__.update(module.__dict__)
+        return getattr(module, attr)
+
+    def __repr__(self):
+        return f"<lazy module {self._name!r}>"
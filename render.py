@@ -0,0 +1,55 @@
+"""Room/desk rendering for the seating view - one pivot per session, one HTML block per room"""
+import html
+
+from lazy import LazyModule
+
+pd = LazyModule('pandas')
+
+GRID_COLUMNS = ['Left RegNo', 'Left Exam', 'Right RegNo', 'Right Exam']
+
+
+def build_room_grids(seating):
+    """Pivot a seating plan once into {room: desk x (Left/Right RegNo/Exam, Clash) grid}"""
+    if seating.empty:
+        return {}
+
+    # A double-booked seat is reported by the verifier; show its first occupant here
+    seats = seating.drop_duplicates(['Classroom', 'Desk', 'Position'])
+    wide = seats.set_index(['Classroom', 'Desk', 'Position'])[['RegNo', 'Exam']].unstack('Position')
+    wide.columns = [f"{position} {field}" for field, position in wide.columns]
+    wide = wide.reindex(columns=GRID_COLUMNS)
+    wide['Clash'] = wide['Left Exam'].notna() & (wide['Left Exam'] == wide['Right Exam'])
+
+    return {
+        room: grid.droplevel('Classroom').sort_index()
+        for room, grid in wide.groupby(level='Classroom', sort=True)
+    }
+
+def _cell(reg_no, exam):
+    if pd.isna(reg_no):
+        return "---"
+    return f"{html.escape(str(reg_no))} | {html.escape(str(exam))}"
+
+def room_grid_html(room, grid):
+    """One HTML table for a room; desks with the same exam on both seats are highlighted"""
+    rows = []
+    for desk, left_reg, left_exam, right_reg, right_exam, clash in grid[GRID_COLUMNS + ['Clash']].itertuples():
+        style = ' style="background-color:#ffd6d6;font-weight:bold"' if clash else ''
+        flag = "⚠️ " if clash else ""
+        rows.append(
+            f"<tr{style}><td>{flag}Desk {desk}</td>"
+            f"<td>{_cell(left_reg, left_exam)}</td><td>{_cell(right_reg, right_exam)}</td></tr>"
+        )
+
+    return (
+        f"<p><b>{html.escape(str(room))}</b> - {int(grid[['Left RegNo', 'Right RegNo']].notna().to_numpy().sum())} students</p>"
+        '<table style="width:100%;border-collapse:collapse">'
+        "<thead><tr><th>Desk</th><th>Left</th><th>Right</th></tr></thead>"
+        f"<tbody>{''.join(rows)}</tbody></table>"
+    )
+
+def paginate(items, page, per_page):
+    """Items on a 1-based page, and the number of pages"""
+    pages = max(1, -(-len(items) // per_page))
+    page = min(max(page, 1), pages)
+    return items[(page - 1) * per_page:page * per_page], pages
@@ -0,0 +1,139 @@
+"""Incremental re-seating - patch a session plan for late changes without reshuffling it"""
+from collections import defaultdict
+
+from core import CLASSROOMS
+from instrument import instrumented
+from lazy import LazyModule
+
+pd = LazyModule('pandas')
+
+DIFF_COLUMNS = [
+    'RegNo', 'Exam', 'Change',
+    'From Classroom', 'From Desk', 'From Position',
+    'To Classroom', 'To Desk', 'To Position'
+]
+
+
+class _Vacancies:
+    """Free seats of a plan: half-empty desks by occupant exam, then empty desks by room"""
+
+    def __init__(self, seating, classrooms, closed_rooms):
+        self.classrooms = classrooms
+        self.closed = set(closed_rooms)
+        self.room_counts = seating['Classroom'].value_counts().to_dict()
+
+        desks = seating.groupby(['Classroom', 'Desk'], sort=False).agg(
+            Seated=('RegNo', 'size'), Exam=('Exam', 'first'), Position=('Position', 'first')
+        )
+        self.used_desks = defaultdict(set)
+        for room, desk in desks.index:
+            self.used_desks[room].add(desk)
+
+        # Half-empty desks keyed by the exam already sitting there
+        self.half_desks = defaultdict(list)
+        for (room, desk), row in desks[desks['Seated'] == 1].iterrows():
+            if room in self.closed or room not in classrooms:
+                continue
+            if classrooms[room] % 2 and desk == (classrooms[room] + 1) // 2:
+                continue  # last desk of an odd-capacity room has a single seat
+            free = 'Right' if row['Position'] == 'Left' else 'Left'
+            self.half_desks[row['Exam']].append((room, desk, free))
+
+        self.next_free_desk = {}
+
+    def _room_has_space(self, room):
+        return self.room_counts.get(room, 0) < self.classrooms[room]
+
+    def _empty_desk(self, room):
+        """Lowest desk number in room that nobody sits at, or None"""
+        desk = self.next_free_desk.get(room, 1)
+        last_desk = (self.classrooms[room] + 1) // 2
+        while desk <= last_desk and desk in self.used_desks[room]:
+            desk += 1
+        self.next_free_desk[room] = desk
+        return desk if desk <= last_desk else None
+
+    def take(self, exam):
+        """Claim a seat for a student of exam: (room, desk, position) or None if the rooms are full"""
+        # 1. Next to a student of a different exam, filling a wasted seat
+        for other_exam, desks in self.half_desks.items():
+            if other_exam == exam:
+                continue
+            while desks:
+                room, desk, position = desks.pop()
+                if self._room_has_space(room):
+                    return self._claim(room, desk, position, exam, paired=True)
+
+        # 2. An empty desk in a room that is already in use, then 3. an unused room
+        in_use = [room for room in self.classrooms if self.room_counts.get(room, 0) > 0]
+        unused = [room for room in self.classrooms if self.room_counts.get(room, 0) == 0]
+        for room in in_use + unused:
+            if room in self.closed or not self._room_has_space(room):
+                continue
+            desk = self._empty_desk(room)
+            if desk is not None:
+                return self._claim(room, desk, 'Left', exam, paired=False)
+
+        return None
+
+    def _claim(self, room, desk, position, exam, paired):
+        self.room_counts[room] = self.room_counts.get(room, 0) + 1
+        self.used_desks[room].add(desk)
+        single_seat = self.classrooms[room] % 2 and desk == (self.classrooms[room] + 1) // 2
+        if not paired and not single_seat:
+            self.half_desks[exam].append((room, desk, 'Right'))
+        return room, desk, position
+
+@instrumented('reseat', rows=lambda result: len(result[1]))
+def update_seating(seating, add=(), remove=(), close_rooms=(), classrooms=None):
+    """Apply late changes to a session plan, touching only the affected desks and rooms
+
+    add:         (RegNo, Exam) pairs to seat (late registrations)
+    remove:      RegNos to unseat (withdrawals)
+    close_rooms: rooms that became unavailable; their students are moved
+
+    Students are placed beside a different exam's half-empty desk first, then at an empty
+    desk of a room in use, then in an unused room, so the different-exam-per-desk rule
+    holds. Everyone else keeps their seat. Returns (new_seating, diff); diff has one row
+    per changed student with Change in removed/added/moved/unseated (no seat left).
+    """
+    if classrooms is None:
+        classrooms = CLASSROOMS
+
+    columns = ['RegNo', 'Exam', 'Classroom', 'Desk', 'Position']
+    if seating.empty:
+        seating = pd.DataFrame(columns=columns)
+
+    diff = []
+    remove = set(remove)
+    close_rooms = set(close_rooms)
+
+    removed = seating['RegNo'].isin(remove)
+    displaced = seating['Classroom'].isin(close_rooms) & ~removed
+    for row in seating[removed].itertuples(index=False):
+        diff.append((row.RegNo, row.Exam, 'removed', row.Classroom, row.Desk, row.Position, None, None, None))
+
+    kept = seating[~removed & ~displaced]
+    vacancies = _Vacancies(kept, classrooms, close_rooms)
+
+    # Displaced students first (they already hold a printed seat), then new registrations
+    pending = [(row.RegNo, row.Exam, 'moved', row.Classroom, row.Desk, row.Position)
+               for row in seating[displaced].itertuples(index=False)]
+    already_seated = set(kept['RegNo'])
+    pending += [(reg_no, exam, 'added', None, None, None) for reg_no, exam in add if reg_no not in already_seated]
+
+    new_rows = []
+    for reg_no, exam, change, *origin in pending:
+        seat = vacancies.take(exam)
+        if seat is None:
+            diff.append((reg_no, exam, 'unseated', *origin, None, None, None))
+            continue
+        new_rows.append((reg_no, exam, *seat))
+        diff.append((reg_no, exam, change, *origin, *seat))
+
+    if new_rows:
+        new_seating = pd.concat([kept, pd.DataFrame(new_rows, columns=columns)], ignore_index=True)
+    else:
+        new_seating = kept.reset_index(drop=True)
+
+    return new_seating, pd.DataFrame(diff, columns=DIFF_COLUMNS)
@@ -0,0 +1,112 @@
+"""Room configuration and per-session room allocation"""
+import bisect
+import csv
+import io
+import json
+from collections import namedtuple
+
+# rooms:    {room: seats to fill} for the rooms opened, in fill order
+# seats:    seats requested
+# overflow: seats that did not fit in any room (0 when the session fits)
+RoomAllocation = namedtuple('RoomAllocation', ['rooms', 'seats', 'overflow'])
+
+STRATEGIES = ['best_fit', 'balanced', 'in_order']
+
+
+def load_classrooms(path):
+    """Load {room: capacity} from a JSON object (or list of {"Room", "Capacity"}) or a CSV
+    with Room,Capacity columns; path may also be an uploaded (binary) file object with a name"""
+    name = str(getattr(path, 'name', path))
+    if hasattr(path, 'read'):
+        text = path.read()
+        f = io.StringIO(text.decode('utf-8') if isinstance(text, bytes) else text)
+    else:
+        f = open(path, newline='')
+    with f:
+        if name.endswith('.json'):
+            data = json.load(f)
+            rows = data.items() if isinstance(data, dict) else [(r['Room'], r['Capacity']) for r in data]
+        else:
+            rows = [(r['Room'], r['Capacity']) for r in csv.DictReader(f)]
+
+    classrooms = {}
+    for room, capacity in rows:
+        room = str(room).strip()
+        capacity = int(capacity)
+        if not room or capacity <= 0:
+            raise ValueError(f"Invalid classroom entry: {room!r} with capacity {capacity}")
+        classrooms[room] = capacity
+    return classrooms
+
+def _best_fit_rooms(seats, classrooms):
+    """Fewest rooms covering seats: open the largest rooms until the rest fits one room,
+    then close out with the smallest room that still holds it (best-fit decreasing).
+    Rooms of equal capacity are taken in classroom-table order."""
+    position = {room: i for i, room in enumerate(classrooms)}
+    # Ascending capacity; among equal rooms the table's first room sorts last, where it is taken
+    by_capacity = sorted(classrooms.items(), key=lambda item: (item[1], -position[item[0]]))
+    capacities = [capacity for _, capacity in by_capacity]
+    chosen = []
+    remaining = seats
+
+    while remaining > 0 and by_capacity:
+        i = bisect.bisect_left(capacities, remaining)
+        if i == len(capacities):
+            i -= 1  # nothing holds the rest - take the largest and keep going
+        else:
+            i = bisect.bisect_right(capacities, capacities[i]) - 1
+        room, capacity = by_capacity.pop(i)
+        capacities.pop(i)
+        chosen.append((room, capacity))
+        remaining -= capacity
+
+    # Fill the biggest rooms first so only the last room is partly empty
+    chosen.sort(key=lambda item: (-item[1], position[item[0]]))
+    return chosen
+
+def allocate_rooms(seats, classrooms, strategy='best_fit'):
+    """Choose the rooms for a session needing seats; never drops seats silently
+
+    best_fit  fewest rooms opened (fewer invigilators), every room full but the last
+    balanced  same rooms as best_fit, with the seats spread in proportion to capacity
+    in_order  rooms in the order of the classroom table (the original behaviour)
+    """
+    if strategy not in STRATEGIES:
+        raise ValueError(f"Unknown room allocation strategy {strategy!r}; expected one of {STRATEGIES}")
+
+    if strategy == 'in_order':
+        chosen = []
+        remaining = seats
+        for room, capacity in classrooms.items():
+            if remaining <= 0:
+                break
+            chosen.append((room, capacity))
+            remaining -= capacity
+    else:
+        chosen = _best_fit_rooms(seats, classrooms)
+
+    total = sum(capacity for _, capacity in chosen)
+    placed = min(seats, total)
+    rooms = {}
+
+    if strategy == 'balanced' and chosen:
+        # Largest-remainder split of the seats, in whole desks (2 seats) where possible
+        shares = [placed * capacity / total for _, capacity in chosen]
+        fill = [min(capacity, int(share) // 2 * 2) for (_, capacity), share in zip(chosen, shares)]
+        order = sorted(range(len(chosen)), key=lambda i: fill[i] - shares[i])
+        leftover = placed - sum(fill)
+        while leftover > 0:
+            for i in order:
+                step = min(leftover, 2, chosen[i][1] - fill[i])
+                fill[i] += step
+                leftover -= step
+                if leftover <= 0:
+                    break
+        rooms = {room: seats_in_room for (room, _), seats_in_room in zip(chosen, fill) if seats_in_room}
+    else:
+        remaining = placed
+        for room, capacity in chosen:
+            rooms[room] = min(capacity, remaining)
+            remaining -= rooms[room]
+
+    return RoomAllocation(rooms=rooms, seats=seats, overflow=seats - placed)
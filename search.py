@@ -0,0 +1,162 @@
+"""Best-of-K plan search - many seeded schedule + seating candidates, scored, cheapest kept
+
+A candidate is fully determined by its seed:
+
+    schedule = create_exam_sessions(course_map, num_sessions, classrooms, seed=seed)
+    plans    = generate_all_seating(None, course_map, schedule, classrooms=classrooms, strategy=strategy, seed=seed)
+
+so the winner can always be regenerated exactly from the seed it reports. Candidates run
+in a process pool (the course map is sent once per worker) and the search stops as soon
+as one scores at or below the target.
+
+Score (lower is better), per weight in SCORE_WEIGHTS:
+
+    overflow      students that did not fit
+    sessions      exam sessions in the schedule
+    rooms         rooms opened, summed over sessions
+    empty_seats   share of the opened rooms' seats left empty, in percent
+    single_desks  desks with one student
+    exam_spread   mean number of exams (question papers) per room
+"""
+import os
+import random
+import time
+from collections import namedtuple
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+from core import CLASSROOMS, create_exam_sessions, seat_session, session_seeds
+from instrument import instrumented
+from lazy import LazyModule
+
+np = LazyModule('numpy')
+
+# seed:      regenerates schedule and plans exactly
+# score:     weighted total (lower is better)
+# metrics:   {'overflow', 'sessions', 'rooms', 'empty_seats', 'single_desks', 'exam_spread', 'utilisation'}
+# schedule:  {session: [courses]}
+# plans:     {session: SessionSeating} with compact SeatingPlans
+# evaluated: candidates scored before the search stopped
+Candidate = namedtuple('Candidate', ['seed', 'score', 'metrics', 'schedule', 'plans', 'evaluated'])
+
+SCORE_WEIGHTS = {
+    'overflow': 1000.0,
+    'sessions': 50.0,
+    'rooms': 1.0,
+    'empty_seats': 1.0,
+    'single_desks': 0.2,
+    'exam_spread': 2.0,
+}
+
+# Per-worker state, set once by the pool initializer
+_context = {}
+
+
+def plan_metrics(plans, classrooms=None):
+    """Quality metrics of {session: SessionSeating} with compact plans"""
+    if classrooms is None:
+        classrooms = CLASSROOMS
+    seated = overflow = rooms = seats = single_desks = room_exams = 0
+    for result in plans.values():
+        plan = result.seating
+        overflow += len(result.overflow)
+        seated += len(plan)
+        rooms += len(plan.rooms)
+        seats += sum(classrooms[room] for room in plan.rooms)
+        if not len(plan):
+            continue
+        # One key per desk and per (room, exam): desks holding one student, papers per room
+        desk_keys = plan.room.astype('int64') * 65536 + plan.desk
+        single_desks += int((np.unique(desk_keys, return_counts=True)[1] == 1).sum())
+        room_exams += len(np.unique(plan.room.astype('int64') * 65536 + plan.exam))
+
+    utilisation = seated / seats if seats else 1.0
+    return {
+        'overflow': overflow,
+        'sessions': len(plans),
+        'rooms': rooms,
+        'empty_seats': round(100 * (1 - utilisation), 3),
+        'single_desks': single_desks,
+        'exam_spread': round(room_exams / rooms, 3) if rooms else 0.0,
+        'utilisation': round(utilisation, 4),
+    }
+
+def plan_score(metrics, weights=None):
+    weights = {**SCORE_WEIGHTS, **(weights or {})}
+    return round(sum(weight * metrics[name] for name, weight in weights.items()), 3)
+
+def build_candidate(course_student_map, seed, num_sessions=None, classrooms=None, strategy='best_fit', weights=None):
+    """Schedule and seat one candidate from its seed, sessions one after another"""
+    schedule = create_exam_sessions(course_student_map, num_sessions, classrooms, seed=seed)
+    seeds = session_seeds(schedule, seed)
+    plans = {
+        session_name: seat_session(course_student_map, courses, classrooms, strategy, compact=True, seed=seeds[session_name])
+        for session_name, courses in schedule.items()
+    }
+    metrics = plan_metrics(plans, classrooms)
+    return Candidate(seed=seed, score=plan_score(metrics, weights), metrics=metrics, schedule=schedule, plans=plans,
+                     evaluated=1)
+
+def _init_worker(course_student_map, num_sessions, classrooms, strategy, weights):
+    _context.update(course_student_map=course_student_map, num_sessions=num_sessions, classrooms=classrooms,
+                    strategy=strategy, weights=weights)
+
+def _candidate_job(seed):
+    return build_candidate(seed=seed, **_context)
+
+@instrumented('search', rows=lambda best: best.evaluated)
+def search_plans(course_student_map, candidates=None, num_sessions=None, classrooms=None, strategy='best_fit',
+                 weights=None, target=None, time_budget=None, max_workers=None, seed=None):
+    """Best of candidates seeded plans (default: 4 per CPU), scored by plan_score
+
+    Stops early once a candidate scores <= target or time_budget seconds have passed
+    (running candidates still finish). Returns the winning Candidate; its seed
+    reproduces it through build_candidate or create_exam_sessions + generate_all_seating.
+    """
+    if classrooms is None:
+        classrooms = CLASSROOMS
+    workers = max_workers or os.cpu_count() or 1
+    candidates = candidates or 4 * workers
+    workers = min(workers, candidates)
+    seeds = random.Random(seed).sample(range(2**31), candidates)
+    deadline = time.perf_counter() + time_budget if time_budget else None
+
+    best = None
+    evaluated = 0
+
+    def better(best, candidate):
+        # Ties go to the smaller seed, so the winner does not depend on finishing order
+        return candidate if best is None or (candidate.score, candidate.seed) < (best.score, best.seed) else best
+
+    def done():
+        return (target is not None and best.score <= target) or (deadline is not None and time.perf_counter() >= deadline)
+
+    if workers == 1:
+        for candidate_seed in seeds:
+            best = better(best, build_candidate(course_student_map, candidate_seed, num_sessions, classrooms, strategy, weights))
+            evaluated += 1
+            if done():
+                break
+        return best._replace(evaluated=evaluated)
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(course_student_map, num_sessions, classrooms, strategy, weights)) as pool:
+        # Keep about two candidates per worker in flight so an early stop wastes little work
+        pending = set()
+        queue = iter(seeds)
+        while True:
+            for candidate_seed in queue:
+                pending.add(pool.submit(_candidate_job, candidate_seed))
+                if len(pending) >= 2 * workers:
+                    break
+            if not pending:
+                break
+            finished, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in finished:
+                best = better(best, future.result())
+                evaluated += 1
+            if done():
+                # Queued candidates are dropped; running ones finish before the pool closes
+                for future in pending:
+                    future.cancel()
+                break
+    return best._replace(evaluated=evaluated)
@@ -0,0 +1,67 @@
+"""Compact, array-backed seating plan
+
+A plan is five parallel arrays, one entry per seat, plus three small vocabularies:
+
+    student  int32   index into students (RegNo strings, shared with the course map)
+    exam     int16   index into exams
+    room     int16   index into rooms
+    desk     uint16  desk number within the room
+    right    bool    False = Left, True = Right
+
+That is 11 bytes per seat plus one string reference per distinct student, against a
+row of Python objects for the dict/DataFrame form. Converters produce the usual
+RegNo, Exam, Classroom, Desk, Position DataFrame at the edges.
+"""
+from lazy import LazyModule
+
+np = LazyModule('numpy')
+pd = LazyModule('pandas')
+
+SEATING_COLUMNS = ['RegNo', 'Exam', 'Classroom', 'Desk', 'Position']
+
+
+class SeatingPlan:
+    """Columnar seating plan; len() is the number of seats"""
+
+    __slots__ = ['students', 'exams', 'rooms', 'student', 'exam', 'room', 'desk', 'right']
+
+    def __init__(self, students, exams, rooms, student, exam, room, desk, right):
+        self.students = np.asarray(students, dtype=object)
+        self.exams = np.asarray(exams, dtype=object)
+        self.rooms = np.asarray(rooms, dtype=object)
+        self.student = np.asarray(student, dtype=np.int32)
+        self.exam = np.asarray(exam, dtype=np.int16)
+        self.room = np.asarray(room, dtype=np.int16)
+        self.desk = np.asarray(desk, dtype=np.uint16)
+        self.right = np.asarray(right, dtype=bool)
+
+    def __len__(self):
+        return len(self.student)
+
+    def __getstate__(self):
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    def __setstate__(self, state):
+        for name, value in state.items():
+            setattr(self, name, value)
+
+    @property
+    def empty(self):
+        return len(self) == 0
+
+    def to_frame(self):
+        """The seating DataFrame in the usual string shape"""
+        return pd.DataFrame({
+            'RegNo': pd.array(self.students[self.student], dtype='str'),
+            'Exam': self.exams[self.exam],
+            'Classroom': self.rooms[self.room],
+            'Desk': self.desk.astype(np.int64),
+            'Position': np.where(self.right, 'Right', 'Left')
+        }, columns=SEATING_COLUMNS)
+
+def as_frame(plan):
+    """Seating DataFrame from a DataFrame, SeatingPlan or SessionSeating"""
+    plan = getattr(plan, 'seating', plan)
+    if isinstance(plan, SeatingPlan):
+        return plan.to_frame()
+    return plan
@@ -0,0 +1,234 @@
+"""Persistent seat store (SQLite) and an async HTTP lookup service for hall-ticket queries
+
+Seats live in one table clustered on (RegNo, Session, Exam), so "where do I sit?" for a
+student is a single B-tree range read across all their sessions - and a student sitting
+two exams in one session (a clash left in by a manual schedule edit) keeps both seats. A second index on
+(Session, Classroom, Desk) serves per-room sheets. The service answers
+
+    GET /seat/<RegNo>             every seat of the student, all sessions
+    GET /room/<Session>/<Room>    one room's seating, by desk
+    GET /health
+"""
+import asyncio
+import json
+import os
+import sqlite3
+from collections import OrderedDict
+from urllib.parse import unquote
+
+from seatplan import as_frame
+
+SEAT_FIELDS = ['Session', 'RegNo', 'Exam', 'Classroom', 'Desk', 'Position']
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS seats (
+    Session   TEXT NOT NULL,
+    RegNo     TEXT NOT NULL,
+    Exam      TEXT NOT NULL,
+    Classroom TEXT NOT NULL,
+    Desk      INTEGER NOT NULL,
+    Position  TEXT NOT NULL,
+    PRIMARY KEY (RegNo, Session, Exam)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS seats_by_room ON seats (Session, Classroom, Desk);
+"""
+_PRIMARY_KEY = ['RegNo', 'Session', 'Exam']
+
+
+class SeatStore:
+    """Seating plans in an embedded SQLite database (WAL mode: readers never block the writer)"""
+
+    def __init__(self, path, readonly=False):
+        self.path = str(path)
+        if readonly:
+            self.conn = sqlite3.connect(f"file:{self.path}?mode=ro", uri=True, check_same_thread=False)
+        else:
+            self.conn = sqlite3.connect(self.path, check_same_thread=False)
+            self.conn.execute("PRAGMA journal_mode=WAL")
+            self.conn.executescript(_SCHEMA)
+            self._upgrade()
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute("PRAGMA cache_size=-65536")   # 64 MB page cache
+        self.conn.execute("PRAGMA mmap_size=268435456")
+
+    def _upgrade(self):
+        """Rebuild a store written with the old (RegNo, Session) key, keeping its seats"""
+        key = [name for _, name, _, _, _, pk in sorted(self.conn.execute("PRAGMA table_info(seats)"), key=lambda c: c[5]) if pk]
+        if key == _PRIMARY_KEY:
+            return
+        with self.conn:
+            self.conn.execute("DROP INDEX IF EXISTS seats_by_room")
+            self.conn.execute("ALTER TABLE seats RENAME TO seats_old")
+            self.conn.executescript(_SCHEMA)
+            self.conn.execute(f"INSERT INTO seats SELECT {', '.join(SEAT_FIELDS)} FROM seats_old")
+            self.conn.execute("DROP TABLE seats_old")
+
+    def close(self):
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def save_plan(self, session_name, seating):
+        """Replace one session's seats with seating (a DataFrame, SeatingPlan or SessionSeating)"""
+        return self.save_plans({session_name: seating})
+
+    def save_plans(self, plans):
+        """Replace the seats of every session in plans in one transaction; returns rows written
+
+        A student seated twice for one exam of a session is refused with ValueError (nothing
+        is written), never silently collapsed to one seat.
+        """
+        rows = 0
+        with self.conn:
+            for session_name, plan in plans.items():
+                seating = as_frame(plan)
+                self.conn.execute("DELETE FROM seats WHERE Session = ?", (session_name,))
+                if seating.empty:
+                    continue
+                twice = seating[seating.duplicated(['RegNo', 'Exam'], keep=False)]
+                if not twice.empty:
+                    raise ValueError(f"{session_name}: {twice['RegNo'].nunique()} students seated more than once for one "
+                                     f"exam, e.g. {twice['RegNo'].iloc[0]} ({twice['Exam'].iloc[0]})")
+                records = seating[SEAT_FIELDS[1:]].astype({'Desk': int}).itertuples(index=False, name=None)
+                cursor = self.conn.executemany(
+                    "INSERT INTO seats VALUES (?, ?, ?, ?, ?, ?)",
+                    ((session_name, str(reg_no), exam, room, int(desk), position)
+                     for reg_no, exam, room, desk, position in records)
+                )
+                rows += cursor.rowcount
+        return rows
+
+    def lookup(self, reg_no):
+        """Every seat of a student as SEAT_FIELDS dicts, ordered by session"""
+        cursor = self.conn.execute(
+            "SELECT Session, RegNo, Exam, Classroom, Desk, Position FROM seats WHERE RegNo = ? ORDER BY Session, Exam",
+            (reg_no,)
+        )
+        return [dict(zip(SEAT_FIELDS, row)) for row in cursor]
+
+    def room(self, session_name, room):
+        """One room's seating in desk order"""
+        cursor = self.conn.execute(
+            "SELECT Session, RegNo, Exam, Classroom, Desk, Position FROM seats "
+            "WHERE Session = ? AND Classroom = ? ORDER BY Desk, Position",
+            (session_name, room)
+        )
+        return [dict(zip(SEAT_FIELDS, row)) for row in cursor]
+
+    def sessions(self):
+        """{session: seats}"""
+        return dict(self.conn.execute("SELECT Session, COUNT(*) FROM seats GROUP BY Session"))
+
+    def data_version(self):
+        """Changes whenever another connection commits, so readers know when to drop caches"""
+        return self.conn.execute("PRAGMA data_version").fetchone()[0]
+
+class _LookupService:
+    """Request handler: one read-only connection per process, answers cached until the store changes"""
+
+    def __init__(self, path, cache_size=100_000):
+        self.store = SeatStore(path, readonly=True)
+        self.cache = OrderedDict()
+        self.cache_size = cache_size
+        self.version = self.store.data_version()
+
+    def _cached(self, key, query):
+        version = self.store.data_version()
+        if version != self.version:
+            self.cache.clear()
+            self.version = version
+        if key in self.cache:
+            self.cache.move_to_end(key)
+            return self.cache[key]
+        result = query()
+        self.cache[key] = result
+        if len(self.cache) > self.cache_size:
+            self.cache.popitem(last=False)
+        return result
+
+    def route(self, path):
+        """(status, JSON body bytes) for a request path"""
+        parts = [unquote(part) for part in path.split('?', 1)[0].strip('/').split('/')]
+        if parts == ['health']:
+            return 200, b'{"status": "ok"}'
+        if len(parts) == 2 and parts[0] == 'seat':
+            return self._cached(('seat', parts[1]), lambda: self._answer(self.store.lookup(parts[1]), 'student'))
+        if len(parts) == 3 and parts[0] == 'room':
+            return self._cached(('room', parts[1], parts[2]), lambda: self._answer(self.store.room(parts[1], parts[2]), 'room'))
+        return 404, b'{"error": "unknown path"}'
+
+    @staticmethod
+    def _answer(seats, what):
+        if not seats:
+            return 404, json.dumps({'error': f"no seats for this {what}"}).encode()
+        return 200, json.dumps(seats).encode()
+
+    async def handle(self, reader, writer):
+        """HTTP/1.1 with keep-alive; GET only, request bodies are not read"""
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                keep_alive = request_line.rstrip().endswith(b'HTTP/1.1')
+                while True:
+                    header = await reader.readline()
+                    if header in (b'\r\n', b'\n', b''):
+                        break
+                    name, _, value = header.partition(b':')
+                    if name.strip().lower() == b'connection':
+                        keep_alive = value.strip().lower() == b'keep-alive'
+
+                parts = request_line.decode('latin-1').split()
+                if len(parts) < 2 or parts[0] != 'GET':
+                    status, body = 405, b'{"error": "GET only"}'
+                else:
+                    status, body = self.route(parts[1])
+
+                reason = {200: 'OK', 404: 'Not Found', 405: 'Method Not Allowed'}[status]
+                writer.write(
+                    f"HTTP/1.1 {status} {reason}\r\nContent-Type: application/json\r\n"
+                    f"Content-Length: {len(body)}\r\nConnection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n".encode()
+                    + body
+                )
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+async def _serve(path, host, port, reuse_port, ready=None):
+    service = _LookupService(path)
+    server = await asyncio.start_server(service.handle, host, port, reuse_port=reuse_port, backlog=4096)
+    if ready is not None:
+        ready(server)
+    async with server:
+        await server.serve_forever()
+
+def _serve_process(path, host, port):
+    asyncio.run(_serve(path, host, port, reuse_port=True))
+
+def serve(path, host='127.0.0.1', port=8080, workers=1):
+    """Run the lookup service; workers > 1 forks processes sharing the port (SO_REUSEPORT)"""
+    if not os.path.exists(path):
+        raise FileNotFoundError(f"Seat store {path} does not exist; save plans into it first")
+    if workers <= 1:
+        asyncio.run(_serve(path, host, port, reuse_port=False))
+        return
+
+    import multiprocessing
+    processes = [multiprocessing.Process(target=_serve_process, args=(path, host, port), daemon=True) for _ in range(workers)]
+    for process in processes:
+        process.start()
+    try:
+        for process in processes:
+            process.join()
+    except KeyboardInterrupt:
+        for process in processes:
+            process.terminate()
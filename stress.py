@@ -0,0 +1,254 @@
+"""Property-based stress harness (headless) - random catalogues, enrolments and room sets
+
+    python stress.py                               # 40 random cases up to 100k students
+    python stress.py --cases 200 --max-students 5000
+    python stress.py --case-seed 1234 --family huge_exam --students 80000   # replay one case
+
+Every case is built from its own seed, scheduled and seated end to end, and checked:
+
+    - every course is scheduled exactly once, no student sits two exams in one session and
+      no session mixes a year's core and elective exams
+    - every (student, exam) of a session is seated exactly once or reported as overflow
+    - no desk holds the same exam twice, no seat is used twice, rooms are only filled up
+      to their capacity (an odd room's last desk has one seat)
+    - verify_seating agrees (no violations other than overflow and, on room grids, the
+      neighbour pairs the seating had to relax)
+    - no stage exceeds its time or memory budget (STAGE_BUDGETS, scaled by students)
+
+A failing case is shrunk by halving its student count while it still fails, and the
+smallest failing case is printed with the command that replays it. Exit code 1 on failure.
+"""
+import argparse
+import math
+import random
+import sys
+import time
+from collections import namedtuple
+
+from core import build_course_incidence, build_course_student_map, create_exam_sessions, seat_session
+import instrument
+from layout import seat_session_layout
+from lazy import LazyModule
+from verify import verify_seating
+
+np = LazyModule('numpy')
+pd = LazyModule('pandas')
+
+FAMILIES = ['random', 'huge_exam', 'single_course', 'over_capacity', 'no_core_year', 'geometry']
+
+# stage: ((seconds, per 100k students), (MB, per 100k students)) per call, measured with
+# tracemalloc on - about 3x what a 100k-student case needs
+STAGE_BUDGETS = {
+    'incidence':      ((0.25, 1.5), (20.0, 80.0)),
+    'course_map':     ((0.25, 0.5), (20.0, 20.0)),
+    'schedule':       ((0.5, 2.0), (20.0, 50.0)),
+    'seating':        ((0.25, 2.0), (20.0, 40.0)),
+    'seating_layout': ((0.5, 4.0), (20.0, 40.0)),
+    'verify':         ((0.25, 1.5), (20.0, 50.0)),
+}
+
+# family:        which shape of odd input the case exercises
+# core_courses:  {year: {branch: [{'code', 'merge'}]}} as CORE_COURSES
+# classrooms:    {room: capacity}
+Case = namedtuple('Case', ['seed', 'family', 'students', 'core_courses', 'classrooms'])
+
+
+def make_case(seed, family, num_students):
+    """Random catalogue, students (with electives) and rooms for one case"""
+    rng = random.Random(seed)
+    gen = np.random.default_rng(seed)
+    years = [1] if family == 'single_course' else list(range(1, rng.randint(2, 4) + 1))
+    year_weights = [50.0] + [1.0] * (len(years) - 1) if family == 'huge_exam' else [rng.random() + 0.2 for _ in years]
+
+    core_courses, electives, sections = {}, {}, {}
+    for year in years:
+        num_branches = 1 if family in ('single_course', 'huge_exam') else rng.randint(1, 6)
+        branches = sections[year] = [f"B{year}{b}" for b in range(num_branches)]
+        if family == 'single_course':
+            core_courses[year] = {branches[0]: [{'code': 'ONLY', 'merge': ''}]}
+            electives[year] = []
+            continue
+        if family == 'no_core_year' and year == years[-1]:
+            core_courses[year] = {}
+        elif family == 'huge_exam' and year == 1:
+            core_courses[year] = {branches[0]: [{'code': 'HUGE', 'merge': ''}]}
+        else:
+            core_courses[year] = {}
+            for branch in branches:
+                codes = [{'code': f"C{year}{branch}{i}", 'merge': ''} for i in range(rng.randint(0, 5))]
+                # Shared (merged) course with another section of the year
+                other = rng.choice(branches)
+                if other != branch and rng.random() < 0.5:
+                    codes.append({'code': f"M{year}{min(branch, other)}{max(branch, other)}", 'merge': other})
+                core_courses[year][branch] = codes
+        electives[year] = [f"E{year}{i}" for i in range(0 if family == 'huge_exam' and year == 1 else rng.randint(0, 8))]
+
+    # Students: year by weight, branch uniformly, an elective or none
+    year_of = gen.choice(years, size=num_students, p=np.array(year_weights) / sum(year_weights))
+    frames = []
+    for year in years:
+        count = int((year_of == year).sum())
+        choices = electives[year] + [''] if electives[year] else ['']
+        frames.append(pd.DataFrame({
+            'RegNo': [f"{year}{i:07d}" for i in range(count)],
+            'Year': year,
+            'Branch': 'Branch',
+            'Section': '',
+            'BranchCode': gen.choice(sections[year], size=count),
+            'Elective': gen.choice(choices, size=count)
+        }))
+    students = pd.concat(frames, ignore_index=True)
+
+    # Rooms: odd and tiny ones included; total capacity a random multiple of the population
+    factor = 0.05 if family == 'over_capacity' else rng.uniform(0.4, 3.0)
+    target = max(1, int(num_students * factor / max(1, len(years))))
+    classrooms = {}
+    while sum(classrooms.values()) < target:
+        classrooms[f"R{len(classrooms):04d}"] = rng.choice([1, 2, 3, rng.randint(4, 120), rng.randint(20, 60)])
+    return Case(seed, family, students, core_courses, classrooms)
+
+def _check_session(session_name, plan, overflow, courses, course_map, classrooms, problems):
+    frame = plan.to_frame()
+    # Exactly once: seated + overflow pairs equal the session's enrolment
+    expected = pd.DataFrame(
+        [(reg_no, course) for course in courses for reg_no in course_map.get(course, {}).get('students', [])],
+        columns=['RegNo', 'Exam']
+    )
+    placed = pd.concat([frame[['RegNo', 'Exam']], overflow[['RegNo', 'Exam']]], ignore_index=True)
+    if len(placed) != len(expected) or placed.duplicated().any():
+        problems.append(f"{session_name}: {len(placed)} seated/overflow for {len(expected)} enrolments")
+    elif len(placed.merge(expected, how='outer', indicator=True).query("_merge != 'both'")):
+        problems.append(f"{session_name}: seated/overflow students differ from the enrolment")
+    if placed['RegNo'].duplicated().any():
+        problems.append(f"{session_name}: a student sits two exams")
+
+    if not len(frame):
+        return
+    # Seats, desks and capacities
+    if frame.duplicated(['Classroom', 'Desk', 'Position']).any():
+        problems.append(f"{session_name}: a seat is used twice")
+    capacity = frame['Classroom'].map(classrooms)
+    if capacity.isna().any():
+        problems.append(f"{session_name}: seated in an unknown room")
+        return
+    seat_number = 2 * frame['Desk'] - (frame['Position'] == 'Left')
+    if (frame['Desk'] < 1).any() or (seat_number > capacity).any():
+        problems.append(f"{session_name}: seat beyond a room's capacity")
+    seated = frame.groupby('Classroom').size()
+    if (seated.to_numpy() > seated.index.map(classrooms).to_numpy()).any():
+        problems.append(f"{session_name}: room over capacity")
+    if frame.duplicated(['Classroom', 'Desk', 'Exam']).any():
+        problems.append(f"{session_name}: a desk holds the same exam twice")
+
+def run_case(case, check_budgets=True):
+    """Schedule and seat one case; returns (problems, stage records)"""
+    problems = []
+    num_students = len(case.students)
+    instrument.clear()
+    with instrument.stage('incidence'):
+        incidence = build_course_incidence(case.students, case.core_courses)
+    course_map = build_course_student_map(case.students, incidence)
+    schedule = create_exam_sessions(course_map, classrooms=case.classrooms, seed=case.seed, restarts=20)
+
+    # Scheduler properties
+    scheduled = [course for courses in schedule.values() for course in courses]
+    if sorted(scheduled) != sorted(course_map):
+        problems.append(f"schedule covers {len(set(scheduled))} of {len(course_map)} courses"
+                        + (" (some twice)" if len(scheduled) != len(set(scheduled)) else ""))
+    for session_name, courses in schedule.items():
+        years = {}
+        for course in courses:
+            years.setdefault(course_map[course]['year'], set()).add(course_map[course]['type'])
+        if any(len(types) > 1 for types in years.values()):
+            problems.append(f"{session_name}: mixes core and elective exams of one year")
+
+    layouts = {} if case.family == 'geometry' else None
+    for session_name, courses in schedule.items():
+        if layouts is not None:
+            result = seat_session_layout(course_map, courses, case.classrooms, layouts, compact=True, seed=case.seed)
+        else:
+            result = seat_session(course_map, courses, case.classrooms, compact=True, seed=case.seed)
+        _check_session(session_name, result.seating, result.overflow, courses, course_map, case.classrooms, problems)
+        violations = verify_seating(result.seating.to_frame(), course_map, courses, case.classrooms, result.overflow,
+                                    layouts)
+        kinds = set(violations['Type']) - {'overflow', 'adjacent_same_exam'}
+        if kinds:
+            problems.append(f"{session_name}: verify_seating reports {', '.join(sorted(kinds))}")
+
+    records = instrument.records()
+    if check_budgets:
+        for record in records:
+            if record['stage'] not in STAGE_BUDGETS:
+                continue
+            (seconds, seconds_per), (mb, mb_per) = STAGE_BUDGETS[record['stage']]
+            scale = num_students / 100_000
+            if record['seconds'] > seconds + seconds_per * scale:
+                problems.append(f"{record['stage']} took {record['seconds']:.3f}s (budget {seconds + seconds_per * scale:.3f}s)")
+            if record['peak_bytes'] / 2**20 > mb + mb_per * scale:
+                problems.append(f"{record['stage']} peaked at {record['peak_bytes'] / 2**20:.1f} MB "
+                                f"(budget {mb + mb_per * scale:.1f} MB)")
+    return problems, records
+
+def shrink(seed, family, num_students, check_budgets):
+    """Smallest student count (halving) at which the case still fails"""
+    smallest = (num_students, run_case(make_case(seed, family, num_students), check_budgets)[0])
+    while smallest[0] > 1:
+        size = smallest[0] // 2
+        problems = run_case(make_case(seed, family, size), check_budgets)[0]
+        if not problems:
+            break
+        smallest = (size, problems)
+    return smallest
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--cases', type=int, default=40)
+    parser.add_argument('--max-students', type=int, default=100_000)
+    parser.add_argument('--seed', type=int, default=0, help="Seed of the case seeds")
+    parser.add_argument('--case-seed', type=int, help="Replay one case (with --family and --students)")
+    parser.add_argument('--family', choices=FAMILIES, default='random')
+    parser.add_argument('--students', type=int, default=1000)
+    parser.add_argument('--no-budgets', action='store_true', help="Check the invariants only")
+    args = parser.parse_args(argv)
+
+    instrument.enable(True)
+    rng = random.Random(args.seed)
+    if args.case_seed is not None:
+        cases = [(args.case_seed, args.family, args.students)]
+    else:
+        # Log-uniform sizes, so small edge cases and the largest populations both come up
+        cases = [
+            (rng.randrange(2**31), FAMILIES[i % len(FAMILIES)],
+             max(1, int(math.exp(rng.uniform(math.log(10), math.log(args.max_students))))))
+            for i in range(args.cases)
+        ]
+        cases[-1] = (cases[-1][0], 'random', args.max_students)   # always one at full size
+
+    print(f"{'Seed':>10} {'Family':<14} {'Students':>9} {'Sessions':>8} {'Wall (s)':>9} {'Peak MB':>8}  Result")
+    failures = 0
+    for seed, family, size in cases:
+        start = time.perf_counter()
+        try:
+            problems, records = run_case(make_case(seed, family, size), not args.no_budgets)
+        except Exception as exc:   # a crash is a failure of the case, not of the harness
+            problems, records = [f"{type(exc).__name__}: {exc}"], instrument.records()
+        wall = time.perf_counter() - start
+        sessions = sum(1 for record in records if record['stage'] in ('seating', 'seating_layout'))
+        peak = max((record['peak_bytes'] for record in records), default=0) / 2**20
+        print(f"{seed:>10} {family:<14} {size:>9} {sessions:>8} {wall:>9.2f} {peak:>8.1f}  {'FAIL' if problems else 'ok'}")
+        if problems:
+            failures += 1
+            try:
+                size, problems = shrink(seed, family, size, not args.no_budgets)
+            except Exception as exc:
+                problems = [f"{type(exc).__name__}: {exc}"]
+            for problem in problems[:10]:
+                print(f"    {problem}")
+            print(f"    replay: python stress.py --case-seed {seed} --family {family} --students {size}")
+
+    print(f"{'❌' if failures else '✅'} {len(cases) - failures}/{len(cases)} cases passed")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,221 @@
+"""Multi-day timetable - place exam sessions onto a day x slot grid
+
+Each slot holds at most one session (a session already fills the classrooms). The cost
+of a grid is, per day,
+
+    back_to_back * students with exams in consecutive slots
+  + same_day     * students with two exams further apart on the same day
+  + load         * (students sitting that day - mean)^2 / mean
+
+Simulated annealing swaps the contents of two slots; only the one or two days touched
+by a swap are re-costed, from a session x session shared-student matrix, so a move is
+O(slots_per_day^2). Independent restarts run in a process pool until the wall-clock
+budget is spent and the cheapest grid wins.
+"""
+import math
+import os
+import random
+import time
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+
+
+from instrument import instrumented
+from lazy import LazyModule
+
+np = LazyModule('numpy')
+pd = LazyModule('pandas')
+
+# slots:     {session: (day, slot)} - both 1-based
+# cost:      total weighted cost
+# breakdown: {'back_to_back', 'same_day': students affected, 'day_loads': students per day}
+# restarts:  annealing runs compared
+Timetable = namedtuple('Timetable', ['slots', 'cost', 'breakdown', 'restarts'])
+
+WEIGHTS = {'back_to_back': 10.0, 'same_day': 3.0, 'load': 1.0}
+
+
+def shared_students(schedule, course_student_map):
+    """(sessions, loads, matrix) - matrix[a][b] = students sitting both session a and b"""
+    sessions = list(schedule)
+    student_ids = {}
+    rows, cols = [], []
+    for j, session_name in enumerate(sessions):
+        seen = set()
+        for course in schedule[session_name]:
+            for reg_no in course_student_map.get(course, {}).get('students', []):
+                if reg_no not in seen:
+                    seen.add(reg_no)
+                    rows.append(student_ids.setdefault(reg_no, len(student_ids)))
+                    cols.append(j)
+
+    incidence = np.zeros((len(student_ids), len(sessions)), dtype=np.float32)
+    incidence[rows, cols] = 1.0
+    matrix = np.rint(incidence.T @ incidence).astype(np.int64)   # BLAS; exact below 2^24
+    loads = np.diag(matrix).copy()
+    np.fill_diagonal(matrix, 0)
+    return sessions, loads, matrix
+
+def _day_cost(grid, day, slots_per_day, shared, loads, mean_load, weights):
+    cells = grid[day * slots_per_day:(day + 1) * slots_per_day]
+    cost = 0.0
+    load = 0
+    for i, a in enumerate(cells):
+        if a < 0:
+            continue
+        load += loads[a]
+        row = shared[a]
+        for j in range(i + 1, slots_per_day):
+            b = cells[j]
+            if b >= 0:
+                cost += (weights['back_to_back'] if j == i + 1 else weights['same_day']) * row[b]
+    if mean_load:
+        cost += weights['load'] * (load - mean_load) ** 2 / mean_load
+    return cost
+
+def _initial_grid(loads, days, slots_per_day, rng):
+    """Largest sessions dealt round-robin over the days, so day loads start even"""
+    grid = [-1] * (days * slots_per_day)
+    order = sorted(range(len(loads)), key=lambda s: (-loads[s], rng.random()))
+    for rank, session in enumerate(order):
+        day, slot = rank % days, rank // days
+        grid[day * slots_per_day + slot] = session
+    return grid
+
+def _anneal(job):
+    """One annealing run: (cost, grid)"""
+    shared, loads, days, slots_per_day, weights, seed, time_budget = job
+    rng = random.Random(seed)
+    mean_load = sum(loads) / days
+    n_slots = days * slots_per_day
+
+    grid = _initial_grid(loads, days, slots_per_day, rng)
+    day_costs = [_day_cost(grid, d, slots_per_day, shared, loads, mean_load, weights) for d in range(days)]
+    cost = sum(day_costs)
+    best_cost, best_grid = cost, list(grid)
+    if n_slots < 2 or best_cost == 0:
+        return best_cost, best_grid
+
+    def swap_delta(p, q):
+        """Swap slots p and q in place; returns (delta, new cost of day p, new cost of day q)"""
+        dp, dq = p // slots_per_day, q // slots_per_day
+        grid[p], grid[q] = grid[q], grid[p]
+        new_p = _day_cost(grid, dp, slots_per_day, shared, loads, mean_load, weights)
+        if dq == dp:
+            return new_p - day_costs[dp], new_p, new_p
+        new_q = _day_cost(grid, dq, slots_per_day, shared, loads, mean_load, weights)
+        return new_p + new_q - day_costs[dp] - day_costs[dq], new_p, new_q
+
+    # Starting temperature: accept a typical uphill move with probability ~1/2
+    uphill = []
+    for _ in range(200):
+        p, q = rng.sample(range(n_slots), 2)
+        delta = swap_delta(p, q)[0]
+        grid[p], grid[q] = grid[q], grid[p]
+        if delta > 0:
+            uphill.append(delta)
+    start_temp = (sum(uphill) / len(uphill) / math.log(2)) if uphill else 1.0
+    end_temp = start_temp * 1e-4
+
+    start = last_improved = time.perf_counter()
+    temperature = start_temp
+    moves = 0
+    while True:
+        moves += 1
+        if moves % 2000 == 0:
+            now = time.perf_counter()
+            progress = (now - start) / time_budget
+            # Out of time, or cooled down and stuck for a fifth of the budget
+            if progress >= 1 or (progress > 0.5 and now - last_improved > 0.2 * time_budget):
+                break
+            temperature = start_temp * (end_temp / start_temp) ** progress
+
+        p, q = rng.randrange(n_slots), rng.randrange(n_slots)
+        if p == q or grid[p] == grid[q]:   # same slot, or two empty slots
+            continue
+        delta, new_p, new_q = swap_delta(p, q)
+        if delta <= 0 or rng.random() < math.exp(-delta / temperature):
+            day_costs[p // slots_per_day] = new_p
+            day_costs[q // slots_per_day] = new_q
+            cost += delta
+            if cost < best_cost - 1e-9:
+                best_cost, best_grid = cost, list(grid)
+                last_improved = time.perf_counter()
+                if best_cost <= 1e-9:
+                    break
+        else:
+            grid[p], grid[q] = grid[q], grid[p]
+
+    # Re-cost the best grid from scratch (the running total accumulates float error)
+    best_cost = sum(_day_cost(best_grid, d, slots_per_day, shared, loads, mean_load, weights) for d in range(days))
+    return best_cost, best_grid
+
+def _breakdown(grid, days, slots_per_day, shared, loads):
+    back_to_back = same_day = 0
+    day_loads = []
+    for day in range(days):
+        cells = grid[day * slots_per_day:(day + 1) * slots_per_day]
+        day_loads.append(int(sum(loads[s] for s in cells if s >= 0)))
+        for i, a in enumerate(cells):
+            for j in range(i + 1, slots_per_day):
+                b = cells[j]
+                if a >= 0 and b >= 0:
+                    if j == i + 1:
+                        back_to_back += shared[a][b]
+                    else:
+                        same_day += shared[a][b]
+    return {'back_to_back': int(back_to_back), 'same_day': int(same_day), 'day_loads': day_loads}
+
+@instrumented('timetable', rows=lambda timetable: len(timetable.slots))
+def optimise_timetable(schedule, course_student_map, days=None, slots_per_day=2, weights=None,
+                       time_budget=10.0, restarts=None, seed=None):
+    """Place the sessions of schedule onto days x slots_per_day, cheapest of several annealing runs
+
+    days defaults to the fewest that hold every session. restarts defaults to the CPU count;
+    the restarts run in parallel and together take at most about time_budget seconds.
+    """
+    weights = {**WEIGHTS, **(weights or {})}
+    sessions, loads, matrix = shared_students(schedule, course_student_map)
+    if not sessions:
+        return Timetable(slots={}, cost=0.0, breakdown=_breakdown([], 0, slots_per_day, [], []), restarts=0)
+    if days is None:
+        days = -(-len(sessions) // slots_per_day)
+    if days * slots_per_day < len(sessions):
+        raise ValueError(f"{len(sessions)} sessions do not fit {days} days x {slots_per_day} slots")
+
+    restarts = restarts or os.cpu_count() or 1
+    workers = min(restarts, os.cpu_count() or 1)
+    # More restarts than cores run in waves that share the wall-clock budget
+    run_budget = time_budget / -(-restarts // workers)
+    seeds = random.Random(seed).sample(range(2**31), restarts)
+    shared, load_list = matrix.tolist(), loads.tolist()
+    jobs = [(shared, load_list, days, slots_per_day, weights, s, run_budget) for s in seeds]
+
+    if workers == 1:
+        results = list(map(_anneal, jobs))
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(_anneal, jobs))
+
+    cost, grid = min(results, key=lambda result: result[0])
+    slots = {
+        sessions[session]: (position // slots_per_day + 1, position % slots_per_day + 1)
+        for position, session in enumerate(grid) if session >= 0
+    }
+    # Day/slot order, for display
+    slots = dict(sorted(slots.items(), key=lambda item: item[1]))
+    return Timetable(slots=slots, cost=cost, breakdown=_breakdown(grid, days, slots_per_day, shared, load_list),
+                     restarts=restarts)
+
+def timetable_frame(timetable, schedule, course_student_map):
+    """Day, Slot, Session, Courses, Students rows in timetable order"""
+    return pd.DataFrame([
+        {
+            'Day': day,
+            'Slot': slot,
+            'Session': session_name,
+            'Courses': ", ".join(schedule[session_name]),
+            'Students': sum(len(course_student_map[c]['students']) for c in schedule[session_name] if c in course_student_map)
+        }
+        for session_name, (day, slot) in timetable.slots.items()
+    ], columns=['Day', 'Slot', 'Session', 'Courses', 'Students'])
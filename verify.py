@@ -0,0 +1,116 @@
+"""Seating plan verification - every check is one vectorised pass over the plan"""
+from core import CLASSROOMS
+from instrument import instrumented
+from layout import resolve_layouts, seat_cells
+from lazy import LazyModule
+
+pd = LazyModule('pandas')
+
+VIOLATION_COLUMNS = ['Type', 'Classroom', 'Desk', 'RegNo', 'Exam', 'Detail']
+
+
+def _records(frame, violation_type, detail):
+    """Shape a frame of offending rows into violation records"""
+    records = pd.DataFrame(index=frame.index, columns=VIOLATION_COLUMNS, dtype=object)
+    for column in ['Classroom', 'Desk', 'RegNo', 'Exam']:
+        if column in frame:
+            records[column] = frame[column]
+    records['Type'] = violation_type
+    records['Detail'] = detail if isinstance(detail, str) else detail.astype(str)
+    return records
+
+@instrumented('verify', rows=len)
+def verify_seating(seating, course_student_map=None, session_courses=None, classrooms=None, overflow=None,
+                   layouts=None):
+    """Check a seating plan and return one row per violation (empty frame = valid plan)
+
+    Types:
+        same_exam_desk    two students of the same exam share a desk
+        seat_taken        one seat holds more than one student
+        over_capacity     a room holds more students than its capacity
+        unknown_room      a room that is not in the classroom table
+        duplicate_student a student is seated more than once
+        missing_student   a student on a session roster is not seated
+        overflow          a roster student reported in overflow (no room left)
+        unexpected_student a seated student/exam pair is not on any session roster
+        exam_clash        a student has two exams in the session
+        adjacent_same_exam same exam at the next desk across or directly behind (with layouts)
+
+    Roster checks need course_student_map and session_courses; pass the overflow frame
+    from seat_session to tell students that did not fit from students that were lost.
+    layouts ({room: RoomLayout}, or {} to derive them from capacities) turns on the
+    neighbour check for plans from layout.seat_session_layout.
+    """
+    if classrooms is None:
+        classrooms = CLASSROOMS
+
+    if seating.empty:
+        seating = pd.DataFrame(columns=['RegNo', 'Exam', 'Classroom', 'Desk', 'Position'])
+
+    violations = []
+
+    if len(seating):
+        # Same exam twice at one desk
+        same_desk = seating[seating.duplicated(['Classroom', 'Desk', 'Exam'], keep=False)]
+        same_desk = same_desk.drop_duplicates(['Classroom', 'Desk', 'Exam'])
+        violations.append(_records(same_desk, 'same_exam_desk', "Same exam at both seats"))
+
+        # One seat, several students
+        taken = seating[seating.duplicated(['Classroom', 'Desk', 'Position'], keep=False)]
+        violations.append(_records(taken, 'seat_taken', taken['Position'] + " seat assigned twice"))
+
+        # Room capacities
+        room_counts = seating['Classroom'].value_counts()
+        capacities = room_counts.index.map(classrooms)
+        known = ~pd.isna(capacities)
+        over = room_counts[known & (room_counts.to_numpy() > capacities.fillna(0).to_numpy())]
+        over_frame = pd.DataFrame({'Classroom': over.index})
+        violations.append(_records(
+            over_frame, 'over_capacity',
+            over.to_numpy().astype(str) + " seated, capacity " + over.index.map(classrooms).astype(int).astype(str)
+        ))
+        unknown = pd.DataFrame({'Classroom': room_counts.index[~known]})
+        violations.append(_records(unknown, 'unknown_room', "Room not in classroom table"))
+
+        # Same student seated twice
+        duplicates = seating[seating.duplicated('RegNo', keep=False)]
+        violations.append(_records(duplicates, 'duplicate_student', "Seated more than once"))
+
+        if layouts is not None:
+            # Neighbours on the room grid: the seat across the gap to the next desk, the seat behind
+            row, seat = seat_cells(seating, resolve_layouts(classrooms, layouts))
+            cells = seating.assign(Row=row, Seat=seat)[['Classroom', 'Row', 'Seat', 'Exam', 'RegNo', 'Desk']]
+            for name, d_row, d_seat, keep in [('beside', 0, 1, cells['Seat'] % 2 == 1), ('behind', 1, 0, None)]:
+                source = cells if keep is None else cells[keep]
+                shifted = source.assign(Row=source['Row'] + d_row, Seat=source['Seat'] + d_seat)
+                pairs = shifted.merge(cells, on=['Classroom', 'Row', 'Seat', 'Exam'], suffixes=('_a', ''))
+                violations.append(_records(pairs, 'adjacent_same_exam', f"Same exam as {name} " + pairs['RegNo_a']))
+
+    if course_student_map is not None and session_courses is not None:
+        roster = pd.DataFrame(
+            [(reg_no, course) for course in session_courses if course in course_student_map
+             for reg_no in course_student_map[course]['students']],
+            columns=['RegNo', 'Exam']
+        )
+
+        # Roster vs plan, matched on (RegNo, Exam)
+        matched = roster.merge(seating[['RegNo', 'Exam']].drop_duplicates(), how='outer', on=['RegNo', 'Exam'], indicator=True)
+        missing = matched[matched['_merge'] == 'left_only']
+        if overflow is not None and len(overflow):
+            reported = missing.merge(overflow[['RegNo', 'Exam']], on=['RegNo', 'Exam'], how='left', indicator='_overflow')
+            reported = reported['_overflow'].to_numpy() == 'both'
+            violations.append(_records(missing[reported], 'overflow', "Did not fit in the classrooms"))
+            missing = missing[~reported]
+        violations.append(_records(missing, 'missing_student', "On roster but not seated"))
+        unexpected = matched[matched['_merge'] == 'right_only'].merge(seating, on=['RegNo', 'Exam'])
+        violations.append(_records(unexpected, 'unexpected_student', "Seated but not on the session roster"))
+
+        # Students with two exams in this session
+        clashes = roster[roster.duplicated('RegNo', keep=False)]
+        clashes = clashes.groupby('RegNo', sort=False)['Exam'].agg(', '.join).reset_index()
+        violations.append(_records(clashes, 'exam_clash', "Two exams in one session: " + clashes['Exam']))
+
+    violations = [v for v in violations if len(v)]
+    if not violations:
+        return pd.DataFrame(columns=VIOLATION_COLUMNS)
+    return pd.concat(violations, ignore_index=True)